@@ -1,7 +1,6 @@
+import asyncio
 import functools
-from typing import Callable, Any, Text, Tuple
-
-import pandas as pd
+from typing import Callable, Any, Optional, Text, Tuple
 
 from utils.constants import (
     HOST_LOCATE,
@@ -11,9 +10,17 @@ from utils.constants import (
     PROXIES,
     RETRIES,
     BACKOFF_FACTOR,
-    REQUEST_ARGS
+    REQUEST_ARGS,
+    POOL_CONNECTIONS,
+    POOL_MAXSIZE,
+    MAX_KEYWORDS,
+    TRENDING_POLL_JITTER,
+    STORY_DIFF_HISTORY
 )
-from service.trending import TrendReq
+from service.async_trending import AsyncTrendReq
+from service.executor import MeteredExecutor
+from service.story_diff import StoryTracker
+from service.trending_poller import TrendingPoller
 
 
 
@@ -42,9 +49,17 @@ class Agent(object):
         retries=RETRIES,
         backoff_factor=BACKOFF_FACTOR,
         requests_args=REQUEST_ARGS,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        disk_cache_path=None,
+        host=None,
+        executor_workers=None,
+        trending_poll_interval=None,
+        trending_poll_jitter=TRENDING_POLL_JITTER,
     ) -> None:
-        
-        self.pytrend = TrendReq(
+        # decoding and pandas parsing run here rather than on the event loop
+        self.executor = MeteredExecutor(max_workers=executor_workers)
+        self.pytrend = AsyncTrendReq(
             hl=hl,
             tz=tz,
             geo=geo,
@@ -52,9 +67,25 @@ class Agent(object):
             proxies=proxies,
             retries=retries,
             backoff_factor=backoff_factor,
-            requests_args=requests_args
+            requests_args=requests_args,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            disk_cache_path=disk_cache_path,
+            host=host,
+            executor=self.executor
         )
 
+        # realtime trending stories refreshed in the background, see `start_trending_poller`,
+        # and what changed between refreshes
+        if trending_poll_interval:
+            self.trending_poller = TrendingPoller(self._fetch_trending,
+                                                  trending_poll_interval,
+                                                  trending_poll_jitter,
+                                                  self.executor,
+                                                  StoryTracker(STORY_DIFF_HISTORY))
+        else:
+            self.trending_poller = None
+
         self.df_interet_over_time = None
     @classmethod
     def load_agent(cls,
@@ -65,7 +96,13 @@ class Agent(object):
                     proxies: Text,
                     retries: int,
                     backoff_factor: int,
-                    requests_args=None
+                    requests_args=None,
+                    pool_connections: int = POOL_CONNECTIONS,
+                    pool_maxsize: int = POOL_MAXSIZE,
+                    disk_cache_path: Optional[Text] = None,
+                    host: Optional[Text] = None,
+                    executor_workers: Optional[int] = None,
+                    trending_poll_interval: Optional[float] = None
         ):
         agent = Agent(
             hl=hl,
@@ -76,6 +113,12 @@ class Agent(object):
             retries=retries,
             backoff_factor=backoff_factor,
             requests_args=requests_args,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            disk_cache_path=disk_cache_path,
+            host=host,
+            executor_workers=executor_workers,
+            trending_poll_interval=trending_poll_interval,
         )
         return agent
     
@@ -83,37 +126,91 @@ class Agent(object):
         """Check if all necessary components are instantiated to use agent."""
         return self.pytrend
 
+    async def close(self) -> None:
+        """Stop the trending poller and release the connections held by the Google
+        Trends client and the executor."""
+        if self.trending_poller is not None:
+            await self.trending_poller.stop()
+        await self.pytrend.close()
+        self.executor.shutdown()
+
+    def executor_stats(self):
+        """Workers of the executor and its queued, running, completed and cancelled calls."""
+        return self.executor.stats()
+
+    def start_trending_poller(self, loop=None) -> None:
+        """Start refreshing the realtime trending snapshot in the background, when configured."""
+        if self.trending_poller is not None:
+            self.trending_poller.start(loop)
+
+    def trending_snapshot(self):
+        """The latest realtime trending snapshot, `None` before the first one or without a poller."""
+        if self.trending_poller is None:
+            return None
+        return self.trending_poller.snapshot
+
+    def trending_changes(self, since: int = 0):
+        """Stories added, removed and reranked by the refreshes after `since`.
+        `None` without a poller. `complete` is false when some of those
+        refreshes are no longer kept: start over from the snapshot."""
+        if self.trending_poller is None:
+            return None
+        seq, changes, complete = self.trending_poller.tracker.changes_since(since)
+        return {
+            'seq': seq,
+            'complete': complete,
+            'changes': [diff.to_dict() for diff in changes if diff],
+        }
+
+    async def _fetch_trending(self):
+        # the poller decides when to refresh, the response cache is skipped
+        return await self.pytrend.realtime_trending_searches(bypass_cache=True)
+
     @agent_must_be_ready
     async def realtime_trending_searches(self):
-        retrieval_result = self.pytrend.realtime_trending_searches()
+        retrieval_result = await self.pytrend.realtime_trending_searches()
         return retrieval_result
     
     @agent_must_be_ready
-    async def interest_over_time(self):
-        intersect_over_time_data = self.pytrend.interest_over_time()
-        intersect_over_time_data = intersect_over_time_data.reset_index()
-        return intersect_over_time_data
+    async def interest_over_time(self, payload=None):
+        intersect_over_time_data = await self.pytrend.interest_over_time(payload=payload)
+        return await self.executor.run(intersect_over_time_data.reset_index)
     
-    def find_trend_base_interes_over_time(
+    @agent_must_be_ready
+    async def find_trend_base_interes_over_time(
         self, keywords, cat=0, timeframe='today 1-m', geo='VN'
         ):
+        """Find the keyword with the highest interest over time among `keywords`
+
+        Keywords play a knockout tournament: each round compares them 5 at a
+        time, all batches of a round concurrently, and the keyword reaching 100
+        in its batch goes through. Finding the strongest of N keywords takes
+        about N/4 requests. The last batch compared is kept in
+        `df_interet_over_time`.
+        """
+        candidates = list(dict.fromkeys(keywords))
+        if not candidates:
+            return None
+        final_batch = None
+
+        async def compare_interest_over_time(batch):
+            data = await self.pytrend.interest_over_time_of(
+                batch, cat=cat, timeframe=timeframe, geo=geo, raw=True)
+            # the batch's peak is 100, ties go to the keyword with the larger total
+            scores = [(data[kw].max(initial=0), data[kw].sum()) for kw in batch]
+            return batch[max(range(len(batch)), key=scores.__getitem__)], data
+
+        while len(candidates) > 1:
+            batches = [candidates[i:i + MAX_KEYWORDS]
+                       for i in range(0, len(candidates), MAX_KEYWORDS)]
+            # a keyword left alone goes through without a request
+            results = await asyncio.gather(*(compare_interest_over_time(batch)
+                                             for batch in batches if len(batch) > 1))
+            candidates = [winner for winner, _ in results]
+            candidates += [batch[0] for batch in batches if len(batch) == 1]
+            final_batch = results[-1][1]
+        if final_batch is not None:
+            import pandas as pd
 
-        # check col have nan value in df
-        
-
-        def compare_interest_over_time(keywords, compare_kw, cat=0, timeframe='today 1-m', geo='VN'):
-            
-            self.pytrend.build_payload(keywords.append(compare_kw),
-                                cat=cat,
-                                timeframe=timeframe,
-                                geo=geo)
-            data = self.pytrend.interest_over_time().reset_index()
-            if data.columns[data.isin([100]).any()] == compare_kw:
-                pass #update df
-            else:
-                pass # select comlum that have highest value and store it
-                # delete df
-                # update df
-            return data
-
-        
+            self.df_interet_over_time = pd.DataFrame(final_batch)
+        return candidates[0]
@@ -0,0 +1,61 @@
+"""CPU time and peak allocation of decoding one realtime trending response:
+the previous `response.text[trim_chars:]` + `json.loads` path versus
+`loads_trimmed` on the raw bytes, with the stdlib parser and with orjson
+when it is installed.
+
+    python -m benchmark.bench_decoding --stories 300 --rounds 200
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from service import json_decoding
+from service.json_decoding import loads_trimmed
+from benchmark.standin import synthetic_realtimetrends
+
+
+def realtime_body(stories):
+    """Body shaped like a realtimetrends response, ")]}'," prefix included"""
+    return synthetic_realtimetrends({'ri': stories}).encode('utf-8')
+
+
+def legacy(content):
+    return json.loads(content.decode('utf-8')[5:])
+
+
+def measure(name, decode, content, rounds):
+    start = time.process_time()
+    for _ in range(rounds):
+        decode(content)
+    cpu = (time.process_time() - start) / rounds * 1000
+
+    tracemalloc.start()
+    decode(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:20s} cpu={cpu:.3f}ms/response peak={peak / 1024:.0f}KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stories', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    content = realtime_body(args.stories)
+    print(f"body: {len(content) / 1024:.0f}KiB, {args.stories} stories")
+
+    orjson = json_decoding.orjson
+    measure('text + json.loads', legacy, content, args.rounds)
+    json_decoding.orjson = None
+    measure('bytes + stdlib', lambda c: loads_trimmed(c, 5), content, args.rounds)
+    json_decoding.orjson = orjson
+    if orjson is not None:
+        measure('bytes + orjson', lambda c: loads_trimmed(c, 5), content, args.rounds)
+    else:
+        print('orjson is not installed')
+
+
+if __name__ == '__main__':
+    main()
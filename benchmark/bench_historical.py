@@ -0,0 +1,56 @@
+"""Wall time of an hourly `get_historical_interest` pull by number of
+concurrent windows, against the local stand-in server with a per-request
+latency standing in for Google's:
+
+    python -m benchmark.bench_historical --days 365 --latency 0.2 --workers 1 4 16
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from benchmark.standin import StandIn
+from service.async_trending import AsyncTrendReq
+from service.trending import TrendReq
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    end = datetime(2022, 1, 1)
+    start = end - timedelta(days=args.days)
+    window = dict(keywords=['bitcoin', 'ethereum'],
+                  year_start=start.year, month_start=start.month, day_start=start.day,
+                  year_end=end.year, month_end=end.month, day_end=end.day)
+
+    with StandIn(latency=args.latency) as standin:
+        # Google's pace is simulated by the latency, the client side limiter is off.
+        # A fresh client per run: cached widget tokens would speed up later runs
+        for workers in args.workers:
+            pytrend = TrendReq(host=standin.url, rate_limit=None,
+                               pool_maxsize=max(args.workers))
+            started = time.perf_counter()
+            df = pytrend.get_historical_interest(max_workers=workers, **window)
+            print(f"threads  workers={workers:3d} rows={len(df)} "
+                  f"wall={time.perf_counter() - started:.2f}s")
+            pytrend.close()
+
+        async def pull(workers):
+            client = AsyncTrendReq(host=standin.url, rate_limit=None,
+                                   pool_maxsize=max(args.workers))
+            started = time.perf_counter()
+            df = await client.get_historical_interest(max_workers=workers, **window)
+            print(f"asyncio  workers={workers:3d} rows={len(df)} "
+                  f"wall={time.perf_counter() - started:.2f}s")
+            await client.close()
+
+        for workers in args.workers:
+            asyncio.run(pull(workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Startup time and peak RSS of a process importing the server's modules,
+as a Sanic worker does, with pandas loaded lazily versus eagerly (what
+`agent.py` and `service/trending.py` used to do at module load):
+
+    python -m benchmark.bench_import --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES = (
+    ('lazy pandas', 'import agent, run'),
+    ('eager pandas', 'import pandas, numpy, agent, run'),
+)
+
+
+def run(code):
+    """Return the wall time in seconds and the peak RSS in KiB of a fresh interpreter running `code`"""
+    code += '; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                         stdout=subprocess.PIPE, text=True).stdout
+    return time.perf_counter() - start, int(out.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    # warm the file system cache
+    for _, code in CASES:
+        run(code)
+    for name, code in CASES:
+        results = [run(code) for _ in range(args.runs)]
+        wall = statistics.median(elapsed for elapsed, _ in results) * 1000
+        rss = max(peak for _, peak in results) / 1024
+        print(f"{name:14s} import={wall:.0f}ms peak_rss={rss:.0f}MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Memory of an hourly interest over time pull held as the DataFrame of
+`interest_over_time` versus a compact `InterestSeries`, and the cost of
+reading it back memory-mapped from an `InterestStore`:
+
+    python -m benchmark.bench_interest_store --days 500 --keywords 5
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark.bench_parsing import timeline_json
+from service.interest_store import InterestSeries, InterestStore
+from service.trending import TrendReq
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--keywords', type=int, default=5)
+    args = parser.parse_args()
+
+    kw_list = ['keyword {}'.format(i) for i in range(args.keywords)]
+    timeline = timeline_json(kw_list, args.days)
+    # the parser only needs the keywords, skip the cookie request of __init__
+    pytrend = TrendReq.__new__(TrendReq)
+    pytrend.kw_list = kw_list
+
+    df = pytrend._parse_interest_over_time(timeline)
+    series = InterestSeries.from_timeline(timeline['default']['timelineData'], kw_list)
+    pd.testing.assert_frame_equal(df, series.to_frame(), check_column_type=False)
+
+    frame_bytes = df.memory_usage(index=True, deep=True).sum()
+    print(f"points: {len(series)}, keywords: {len(kw_list)}")
+    print(f"DataFrame      {frame_bytes / 1024:8.0f}KiB")
+    print(f"InterestSeries {series.nbytes / 1024:8.0f}KiB  ({frame_bytes / series.nbytes:.1f}x smaller)")
+
+    with tempfile.TemporaryDirectory() as root:
+        store = InterestStore(root)
+        key = [kw_list, 'hourly', args.days]
+        store.put(key, series)
+        start = time.perf_counter()
+        mapped = store.get(key)
+        opened = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        mapped.to_frame()
+        built = (time.perf_counter() - start) * 1000
+        print(f"memory-mapped open {opened:.2f}ms, to_frame {built:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Per-call latency of `TrendReq._get_data` with a fresh session per call
+(the previous behaviour) versus the pooled keep-alive session.
+
+Runs against the local stand-in server over HTTPS, like Google, so the fresh
+session pays the TCP and TLS handshakes on every call. No request reaches
+Google:
+
+    python -m benchmark.bench_session --calls 500
+"""
+import argparse
+import json
+import statistics
+import time
+import warnings
+
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+
+from benchmark.standin import StandIn
+from service.trending import TrendReq
+from utils.constants import REALTIME_TRENDING_SEARCHES_URL
+
+
+PARAMS = {'ri': 1}
+
+
+def legacy_get_data(pytrend, cookies, url, trim_chars=0, **kwargs):
+    """What `_get_data` used to do: build a session per call and drop it
+
+    Retries are 0 here, so no retrying adapter was mounted either.
+    """
+    s = requests.session()
+    s.headers.update({'accept-language': pytrend.hl})
+    response = s.get(pytrend._url(url), timeout=pytrend.timeout, cookies=cookies,
+                     **kwargs, **pytrend.requests_args)
+    return json.loads(response.text[trim_chars:])
+
+
+def measure(fn, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:16s} p50={statistics.median(timings):.3f}ms "
+          f"mean={statistics.mean(timings):.3f}ms p99={p99:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the stand-in waits before every response')
+    args = parser.parse_args()
+
+    # the stand-in's certificate is self-signed
+    warnings.simplefilter('ignore', InsecureRequestWarning)
+    with StandIn(latency=args.latency, tls=True) as standin:
+        pytrend = TrendReq(rate_limit=None, host=standin.url, requests_args={'verify': False})
+        cookies = pytrend._cookies(None)
+
+        report('fresh session', measure(
+            lambda: legacy_get_data(pytrend, cookies, REALTIME_TRENDING_SEARCHES_URL,
+                                    trim_chars=5, params=PARAMS),
+            args.calls))
+        report('pooled session', measure(
+            lambda: pytrend._get_data(REALTIME_TRENDING_SEARCHES_URL, trim_chars=5,
+                                      params=PARAMS, bypass_cache=True),
+            args.calls))
+
+        pytrend.close()
+
+
+if __name__ == '__main__':
+    main()
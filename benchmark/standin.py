@@ -0,0 +1,593 @@
+"""Local stand-in for trends.google.com
+
+Serves every endpoint of `utils/constants.py` so `TrendReq`, `Agent` and the
+server can be exercised offline. For each request the stand-in answers, in
+order, with:
+
+1. a recording of the same endpoint and query (`token` ignored),
+2. a recording of the same endpoint,
+3. a synthetic Google-shaped response built from the request parameters,
+   deterministic for the same keywords so benchmarks are repeatable.
+
+Recordings are made by running the stand-in with `--record`: requests are
+forwarded to Google and the responses stored in the fixtures directory.
+Latency, server errors and 429 quota answers can be injected. With `--tls`
+the stand-in serves HTTPS with a throwaway self-signed certificate (made with
+the `openssl` command), clients must not verify it.
+
+    python -m benchmark.standin --port 8765 --latency 0.05 --rate-limited-rate 0.01
+    TRENDS_HOST=http://127.0.0.1:8765 python run.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from utils.constants import (
+    TRENDS_HOST,
+    GENERAL_URL,
+    INTEREST_OVER_TIME_URL,
+    INTEREST_BY_REGION_URL,
+    RELATED_QUERIES_URL,
+    TRENDING_SEARCHES_URL,
+    TOP_CHARTS_URL,
+    SUGGESTIONS_URL,
+    CATEGORIES_URL,
+    TODAY_SEARCHES_URL,
+    REALTIME_TRENDING_SEARCHES_URL
+)
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+QUOTA_MESSAGE = 'You have reached your quota limit. Please try again later.'
+COOKIE_PATH = '/'
+
+# fixture name of every endpoint, by path
+ENDPOINTS = {
+    urlsplit(url).path: name for url, name in (
+        (GENERAL_URL, 'explore'),
+        (INTEREST_OVER_TIME_URL, 'multiline'),
+        (INTEREST_BY_REGION_URL, 'comparedgeo'),
+        (RELATED_QUERIES_URL, 'relatedsearches'),
+        (TRENDING_SEARCHES_URL, 'hottrends'),
+        (TOP_CHARTS_URL, 'topcharts'),
+        (SUGGESTIONS_URL, 'autocomplete'),
+        (CATEGORIES_URL, 'category'),
+        (TODAY_SEARCHES_URL, 'dailytrends'),
+        (REALTIME_TRENDING_SEARCHES_URL, 'realtimetrends'),
+    )
+}
+ENDPOINTS[COOKIE_PATH] = 'cookie'
+
+
+def endpoint_name(path):
+    """Return the fixture name of a request path, autocomplete carries the keyword in it"""
+    if path in ENDPOINTS:
+        return ENDPOINTS[path]
+    for prefix, name in ENDPOINTS.items():
+        if prefix.endswith('/') and prefix != COOKIE_PATH and path.startswith(prefix):
+            return name
+    return None
+
+
+def query_digest(path, query):
+    """Identify a request for recordings, widget tokens change on every explore call"""
+    params = sorted((k, v) for k, v in parse_qsl(query) if k != 'token')
+    return hashlib.sha1((path + '?' + urlencode(params)).encode('utf-8')).hexdigest()[:16]
+
+
+def _rng(*parts):
+    return random.Random(hashlib.sha1(repr(parts).encode('utf-8')).hexdigest())
+
+
+def _popularity(keyword):
+    """Stable search volume of a keyword, spread over two orders of magnitude"""
+    return 10 ** (_rng('popularity', keyword).random() * 2)
+
+
+def _prefixed(payload, prefix=")]}',\n"):
+    return prefix + json.dumps(payload, ensure_ascii=False)
+
+
+def _timeline(timeframe, now):
+    """Return the point times and step of a timeframe, as Google resolves it"""
+    presets = {
+        'now 1-H': (60, timedelta(minutes=1)),
+        'now 4-H': (240, timedelta(minutes=1)),
+        'now 1-d': (180, timedelta(minutes=8)),
+        'now 7-d': (168, timedelta(hours=1)),
+        'today 1-m': (30, timedelta(days=1)),
+        'today 3-m': (90, timedelta(days=1)),
+        'today 12-m': (52, timedelta(weeks=1)),
+        'today 5-y': (260, timedelta(weeks=1)),
+    }
+    if timeframe in presets:
+        count, step = presets[timeframe]
+        return [now - step * (count - i) for i in range(count)], step
+    try:
+        start, end = timeframe.split(' ')
+        if 'T' in start:
+            start = datetime.strptime(start, '%Y-%m-%dT%H')
+            end = datetime.strptime(end, '%Y-%m-%dT%H')
+            step = timedelta(hours=1)
+        else:
+            start = datetime.strptime(start, '%Y-%m-%d')
+            end = datetime.strptime(end, '%Y-%m-%d')
+            step = timedelta(days=1) if (end - start).days <= 270 else timedelta(weeks=1)
+    except ValueError:
+        return [now - timedelta(weeks=260 - i) for i in range(260)], timedelta(weeks=1)
+    count = max(int((end - start) / step) + 1, 1)
+    return [start + step * i for i in range(count)], step
+
+
+def synthetic_explore(params):
+    req = json.loads(params.get('req', '{}'))
+    items = req.get('comparisonItem', [])
+    time_range = items[0]['time'] if items else 'today 5-y'
+    base = {
+        'comparisonItem': [{'geo': {'country': item.get('geo')} if item.get('geo') else {},
+                            'complexKeywordsRestriction': {'keyword': [
+                                {'type': 'BROAD', 'value': item['keyword']}]}}
+                           for item in items],
+        'requestOptions': {'property': req.get('property', ''), 'backend': 'IZG',
+                           'category': req.get('category', 0)},
+        'time': time_range,
+    }
+    widgets = [
+        {'id': 'TIMESERIES', 'title': 'Interest over time', 'token': 'standin-timeseries',
+         'request': dict(base, resolution='WEEK', locale=params.get('hl', ''))},
+        {'id': 'GEO_MAP', 'title': 'Compared breakdown by region', 'token': 'standin-geo',
+         'request': dict(base, resolution='COUNTRY', locale=params.get('hl', ''))},
+    ]
+    for i, item in enumerate(items):
+        restriction = {'geo': base['comparisonItem'][i]['geo'], 'time': item['time'],
+                       'originalTimeRangeForExploreUrl': item['time'],
+                       'complexKeywordsRestriction': {'keyword': [
+                           {'type': 'BROAD', 'value': item['keyword']}]}}
+        suffix = '_{}'.format(i) if len(items) > 1 else ''
+        for widget_id, keyword_type in (('RELATED_TOPICS', 'ENTITY'),
+                                        ('RELATED_QUERIES', 'QUERY')):
+            widgets.append({
+                'id': widget_id + suffix,
+                'title': widget_id.replace('_', ' ').title(),
+                'token': 'standin-related',
+                'request': {'restriction': restriction, 'keywordType': keyword_type,
+                            'metric': ['TOP', 'RISING'], 'trendinessSettings': {},
+                            'requestOptions': base['requestOptions'],
+                            'language': params.get('hl', '')[:2]},
+            })
+    return _prefixed({'widgets': widgets, 'keywords': [], 'timeRanges': [], 'examples': [],
+                      'shareText': 'Explore search interest', 'shouldShowMultiHeatMapMessage': False},
+                     prefix=")]}'\n")
+
+
+def synthetic_multiline(params, now):
+    req = json.loads(params.get('req', '{}'))
+    keywords = [item['complexKeywordsRestriction']['keyword'][0]['value']
+                for item in req.get('comparisonItem', [])]
+    times, step = _timeline(req.get('time', 'today 5-y'), now)
+    series = []
+    for kw in keywords:
+        rng = _rng('multiline', kw, req.get('time'))
+        weight = _popularity(kw)
+        series.append([weight * (0.5 + rng.random()) for _ in times])
+    peak = max((max(s) for s in series if s), default=1.0)
+    timeline = []
+    for i, point in enumerate(times):
+        values = [int(round(s[i] / peak * 100)) for s in series]
+        entry = {
+            'time': str(int((point - datetime(1970, 1, 1)).total_seconds())),
+            'formattedTime': point.strftime('%b %d, %Y'),
+            'formattedAxisTime': point.strftime('%b %d'),
+            'value': values,
+            'hasData': [value > 0 for value in values],
+            'formattedValue': [str(value) if value else '<1' for value in values],
+        }
+        if i == len(times) - 1:
+            entry['isPartial'] = True
+        timeline.append(entry)
+    return _prefixed({'default': {'timelineData': timeline, 'averages': []}})
+
+
+def synthetic_comparedgeo(params):
+    req = json.loads(params.get('req', '{}'))
+    keywords = [item['complexKeywordsRestriction']['keyword'][0]['value']
+                for item in req.get('comparisonItem', [])]
+    count = {'COUNTRY': 250, 'REGION': 63, 'DMA': 210, 'CITY': 2000}.get(
+        req.get('resolution', 'COUNTRY'), 250)
+    rows = []
+    weights = [_popularity(kw) for kw in keywords]
+    for i in range(count):
+        rng = _rng('geo', i, tuple(keywords))
+        values = [w * rng.random() for w in weights]
+        rows.append(values)
+    peak = max((max(v) for v in rows if v), default=1.0)
+    geo = []
+    for i, raw in enumerate(rows):
+        values = [int(round(v / peak * 100)) for v in raw]
+        geo.append({
+            'geoCode': 'G{:04d}'.format(i),
+            'geoName': 'Region {:04d}'.format(i),
+            'value': values,
+            'formattedValue': [str(v) for v in values],
+            'maxValueIndex': values.index(max(values)) if values else 0,
+            'hasData': [v > 0 for v in values],
+        })
+    return _prefixed({'default': {'geoMapData': geo}})
+
+
+def synthetic_relatedsearches(params):
+    req = json.loads(params.get('req', '{}'))
+    try:
+        keyword = req['restriction']['complexKeywordsRestriction']['keyword'][0]['value']
+    except (KeyError, IndexError):
+        keyword = ''
+    topics = req.get('keywordType') == 'ENTITY'
+    ranked = []
+    for metric in ('top', 'rising'):
+        rng = _rng('related', keyword, metric, topics)
+        entries = []
+        for i in range(25):
+            value = 100 - i * 4 if metric == 'top' else rng.randint(50, 5000)
+            entry = {'value': value, 'formattedValue': str(value), 'hasData': True,
+                     'link': '/trends/explore?q={}'.format(i)}
+            if topics:
+                entry['topic'] = {'mid': '/m/0{}{}'.format(metric[0], i),
+                                  'title': '{} topic {}'.format(keyword, i), 'type': 'Topic'}
+            else:
+                entry['query'] = '{} {} {}'.format(keyword, metric, i)
+            entries.append(entry)
+        ranked.append({'rankedKeyword': entries})
+    return _prefixed({'default': {'rankedList': ranked}})
+
+
+def synthetic_hottrends():
+    return json.dumps({country: ['{} trend {}'.format(country, i) for i in range(20)]
+                       for country in ('vietnam', 'united_states', 'japan')})
+
+
+def synthetic_topcharts(params):
+    year = params.get('date', '2021')
+    items = [{'title': 'Top search {} of {}'.format(i, year),
+              'exploreQuery': 'top {} {}'.format(i, year)} for i in range(10)]
+    return _prefixed({'topCharts': [{'id': 'searches', 'title': 'Searches', 'listItems': items}]})
+
+
+def synthetic_autocomplete(keyword):
+    topics = [{'mid': '/m/0s{}'.format(i), 'title': '{} {}'.format(keyword, i), 'type': 'Topic'}
+              for i in range(5)]
+    return _prefixed({'default': {'topics': topics}})
+
+
+def synthetic_category():
+    def category(name, id_, depth):
+        node = {'name': name, 'id': id_}
+        if depth:
+            node['children'] = [category('{} {}'.format(name, i), id_ * 10 + i + 1, depth - 1)
+                                for i in range(5)]
+        return node
+    return _prefixed(category('All categories', 0, 3))
+
+
+def _article(i, j):
+    return {
+        'articleTitle': 'Tin tức nổi bật số {} về chủ đề {}'.format(j, i),
+        'url': 'https://vnexpress.net/tin-tuc-{}-{}.html'.format(i, j),
+        'source': 'VnExpress',
+        'time': '{} giờ trước'.format(j + 1),
+        'snippet': 'Đoạn trích ngắn mô tả nội dung bài viết, ' * 3,
+    }
+
+
+def synthetic_dailytrends(params, now, days=2):
+    result = []
+    for d in range(days):
+        day = now - timedelta(days=d)
+        searches = []
+        for i in range(20):
+            searches.append({
+                'title': {'query': 'Xu hướng {} ngày {}'.format(i, day.strftime('%d/%m')),
+                          'exploreLink': '/trends/explore?q={}'.format(i)},
+                'formattedTraffic': '{}K+'.format((20 - i) * 10),
+                'relatedQueries': [{'query': 'liên quan {} {}'.format(i, k),
+                                    'exploreLink': '/trends/explore?q={}'.format(k)}
+                                   for k in range(3)],
+                'image': {'newsUrl': 'https://zingnews.vn/{}.html'.format(i), 'source': 'Zing News',
+                          'imageUrl': 'https://t0.gstatic.com/images?q={}'.format(i)},
+                'articles': [_article(i, j) for j in range(3)],
+                'shareUrl': 'https://trends.google.com/trends/trendingsearches/daily?geo={}'.format(
+                    params.get('geo', 'VN')),
+            })
+        result.append({'date': day.strftime('%Y%m%d'),
+                       'formattedDate': day.strftime('%A, %B %d, %Y'),
+                       'trendingSearches': searches})
+    return _prefixed({'default': {'trendingSearchesDays': result,
+                                  'endDateForNextRequest': (now - timedelta(days=days)).strftime('%Y%m%d'),
+                                  'rssFeedPageUrl': 'https://trends.google.com/trends/trendingsearches/daily/rss'}})
+
+
+def synthetic_realtimetrends(params, offset=0):
+    """Realtime stories; `offset` rotates which stories are trending"""
+    count = int(params.get('ri', 300))
+    trending = []
+    for rank in range(count):
+        i = rank + offset
+        trending.append({
+            'image': {
+                'newsUrl': 'https://zingnews.vn/bai-viet-{}.html'.format(i),
+                'source': 'Zing News',
+                'imgUrl': '//t0.gstatic.com/images?q=tbn:{}'.format(i),
+            },
+            'shareUrl': 'https://trends.google.com/trends/trendingsearches/realtime?id=VN_lnk_{}'.format(i),
+            'articles': [_article(i, j) for j in range(6)],
+            'idsForDedup': ['/m/0{} /m/1{}'.format(i, i)],
+            'id': 'VN_lnk_{}_vi'.format(i),
+            'title': 'Chủ đề {}, Sự kiện {}'.format(i, i * 7),
+            'entityNames': ['Chủ đề {}'.format(i), 'Sự kiện {}'.format(i * 7)],
+        })
+    return _prefixed({
+        'featuredStoryIds': [],
+        'trendingStoryIds': [story['id'] for story in trending],
+        'storySummaries': {'featuredStories': [], 'trendingStories': trending},
+        'date': datetime.utcnow().strftime('%Y%m%d'),
+        'hideAllImages': False,
+    })
+
+
+class StandIn(object):
+    """
+    Threaded stand-in server for trends.google.com
+
+    :param fixtures_dir: directory of the recordings
+    :param latency: seconds added to every response
+    :param jitter: maximum random seconds added on top of `latency`
+    :param error_rate: share of requests answered with a 500
+    :param rate_limited_rate: share of requests answered with a 429 quota message
+    :param max_rps: requests per second above which every request gets a 429
+    :param story_churn: realtime stories replaced by new ones on each realtime request
+    :param record: forward requests to `upstream` and record the responses
+    :param tls: serve HTTPS with a self-signed certificate
+    """
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limited_rate=0.0, max_rps=None,
+                 story_churn=0, record=False, upstream=TRENDS_HOST, seed=None,
+                 tls=False):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limited_rate = rate_limited_rate
+        self.max_rps = max_rps
+        self.story_churn = story_churn
+        self.record = record
+        self.upstream = upstream
+        self.tls = tls
+        self.hits = dict()
+        self._random = random.Random(seed)
+        self._realtime_requests = 0
+        self._tokens = max_rps or 0
+        self._tokens_updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return '{}://{}:{}'.format('https' if self.tls else 'http', host, port)
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve in a background thread and return the base URL to give TrendReq as `host`"""
+        standin = self
+
+        class Handler(_Handler):
+            pass
+        Handler.standin = standin
+        self._server = _Server((host, port), Handler)
+        if self.tls:
+            # handshakes happen in the handler threads, not in the accept loop
+            self._server.socket = _tls_context(host).wrap_socket(
+                self._server.socket, server_side=True, do_handshake_on_connect=False)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _throttled(self):
+        if not self.max_rps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps,
+                               self._tokens + (now - self._tokens_updated) * self.max_rps)
+            self._tokens_updated = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def _fixture_path(self, name, digest=None):
+        filename = '{}-{}.json'.format(name, digest) if digest else '{}.json'.format(name)
+        return os.path.join(self.fixtures_dir, filename)
+
+    def _load_fixture(self, name, digest):
+        for path in (self._fixture_path(name, digest), self._fixture_path(name)):
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+
+    def _save_fixture(self, name, digest, fixture):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        for path in (self._fixture_path(name, digest), self._fixture_path(name)):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(fixture, f, ensure_ascii=False)
+
+    def respond(self, path, query):
+        """Return `(status, headers, body)` for a request"""
+        name = endpoint_name(path)
+        with self._lock:
+            self.hits[name] = self.hits.get(name, 0) + 1
+            roll = self._random.random()
+            delay = self.latency + self._random.random() * self.jitter
+        if delay > 0:
+            time.sleep(delay)
+        if name is None:
+            return 404, {'Content-Type': 'text/html'}, 'Not Found'
+        if self._throttled() or roll < self.rate_limited_rate:
+            return 429, {'Content-Type': 'text/html'}, QUOTA_MESSAGE
+        if roll < self.rate_limited_rate + self.error_rate:
+            return 500, {'Content-Type': 'text/html'}, 'Internal Server Error'
+
+        digest = query_digest(path, query)
+        if self.record:
+            return self._record(name, digest, path, query)
+        fixture = self._load_fixture(name, digest)
+        if fixture is not None:
+            return fixture['status'], {'Content-Type': fixture['content_type']}, fixture['body']
+        return 200, *self._synthetic(name, path, dict(parse_qsl(query)))
+
+    def _record(self, name, digest, path, query):
+        import requests
+
+        response = requests.get(self.upstream + path + ('?' + query if query else ''),
+                                timeout=(5, 30))
+        headers = {'Content-Type': response.headers.get('Content-Type', JSON_CONTENT_TYPE)}
+        if name == 'cookie':
+            headers['Set-Cookie'] = '; '.join('{}={}'.format(k, v)
+                                              for k, v in response.cookies.items() if k == 'NID')
+        elif response.status_code == 200:
+            self._save_fixture(name, digest, {'status': response.status_code,
+                                              'content_type': headers['Content-Type'],
+                                              'body': response.text})
+        return response.status_code, headers, response.text
+
+    def _synthetic(self, name, path, params):
+        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        headers = {'Content-Type': JSON_CONTENT_TYPE}
+        if name == 'cookie':
+            headers['Content-Type'] = 'text/html'
+            headers['Set-Cookie'] = 'NID=standin; Path=/'
+            return headers, '<html></html>'
+        if name == 'explore':
+            return headers, synthetic_explore(params)
+        if name == 'multiline':
+            return headers, synthetic_multiline(params, now)
+        if name == 'comparedgeo':
+            return headers, synthetic_comparedgeo(params)
+        if name == 'relatedsearches':
+            return headers, synthetic_relatedsearches(params)
+        if name == 'hottrends':
+            return headers, synthetic_hottrends()
+        if name == 'topcharts':
+            return headers, synthetic_topcharts(params)
+        if name == 'autocomplete':
+            return headers, synthetic_autocomplete(unquote(path.rsplit('/', 1)[-1]))
+        if name == 'category':
+            return headers, synthetic_category()
+        if name == 'dailytrends':
+            return headers, synthetic_dailytrends(params, now)
+        with self._lock:
+            offset = self._realtime_requests * self.story_churn
+            self._realtime_requests += 1
+        return headers, synthetic_realtimetrends(params, offset)
+
+
+def _tls_context(host):
+    """Return a server TLS context with a fresh self-signed certificate for `host`"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cert, key = os.path.join(tmp_dir, 'cert.pem'), os.path.join(tmp_dir, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                        '-days', '1', '-subj', '/CN={}'.format(host),
+                        '-keyout', key, '-out', cert],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        return context
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections opened by concurrent clients
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, do not let Nagle delay keep-alive responses
+    disable_nagle_algorithm = True
+    standin = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, headers, body = self.standin.respond(url.path, url.query)
+        body = body.encode('utf-8')
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limited-rate', type=float, default=0.0)
+    parser.add_argument('--max-rps', type=float, default=None)
+    parser.add_argument('--story-churn', type=int, default=0)
+    parser.add_argument('--record', action='store_true',
+                        help='forward requests to Google and record the responses')
+    parser.add_argument('--tls', action='store_true',
+                        help='serve HTTPS with a self-signed certificate')
+    args = parser.parse_args()
+
+    standin = StandIn(fixtures_dir=args.fixtures, latency=args.latency, jitter=args.jitter,
+                      error_rate=args.error_rate, rate_limited_rate=args.rate_limited_rate,
+                      max_rps=args.max_rps, story_churn=args.story_churn, record=args.record,
+                      tls=args.tls)
+    print('Google Trends stand-in on {}'.format(standin.start(args.host, args.port)))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
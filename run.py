@@ -1,4 +1,5 @@
 import os
+import argparse
 import logging
 from functools import partial
 
@@ -13,6 +14,7 @@ from utils.utils import (
     list_routes,
     enable_async_loop_debugging,
     number_of_sanic_workers,
+    number_of_executor_workers,
     update_sanic_log_level
     )
 from utils.constants import (
@@ -20,6 +22,11 @@ from utils.constants import (
     DEFAULT_SERVER_PORT,
     DEFAULT_RESPONSE_TIMEOUT,
     ENV_SANIC_BACKLOG,
+    ENV_DISK_CACHE_PATH,
+    ENV_TRENDS_HOST,
+    ENV_AGENT_EXECUTOR_WORKERS,
+    ENV_TRENDING_POLL_INTERVAL,
+    DEFAULT_TRENDING_POLL_INTERVAL,
     HOST_LOCATE,
     TIME_ZONE,
     TIME_OUT,
@@ -27,7 +34,9 @@ from utils.constants import (
     PROXIES,
     RETRIES,
     BACKOFF_FACTOR,
-    REQUEST_ARGS
+    REQUEST_ARGS,
+    POOL_CONNECTIONS,
+    POOL_MAXSIZE
 )
 from agent import Agent
 
@@ -77,6 +86,12 @@ def serve_application(
     retries=RETRIES,
     backoff_factor=BACKOFF_FACTOR,
     requests_args=REQUEST_ARGS,
+    pool_connections=POOL_CONNECTIONS,
+    pool_maxsize=POOL_MAXSIZE,
+    disk_cache_path: Optional[Text] = None,
+    host: Optional[Text] = None,
+    executor_workers: Optional[int] = None,
+    trending_poll_interval: Optional[float] = None,
     interface: Optional[Text] = DEFAULT_SERVER_INTERFACE,
     port: int = DEFAULT_SERVER_PORT,
     cors: Optional[Union[Text, List[Text]]] = None,
@@ -120,9 +135,16 @@ def serve_application(
                 proxies,
                 retries,
                 backoff_factor,
-                requests_args),
+                requests_args,
+                pool_connections,
+                pool_maxsize,
+                disk_cache_path or os.environ.get(ENV_DISK_CACHE_PATH),
+                host or os.environ.get(ENV_TRENDS_HOST),
+                executor_workers or number_of_executor_workers(),
+                trending_poll_interval_or_default(trending_poll_interval)),
         "before_server_start",
     )
+    app.register_listener(close_agent_on_stop, "after_server_stop")
 
     number_of_workers = number_of_sanic_workers()
     update_sanic_log_level(
@@ -149,6 +171,12 @@ def load_agent_on_start(
                     retries: int,
                     backoff_factor: int,
                     requests_args,
+                    pool_connections: int,
+                    pool_maxsize: int,
+                    disk_cache_path: Optional[Text],
+                    host: Optional[Text],
+                    executor_workers: Optional[int],
+                    trending_poll_interval: Optional[float],
                     app: Sanic,
                     loop: Text,
     ) -> Agent:
@@ -164,6 +192,12 @@ def load_agent_on_start(
         retries=retries,
         backoff_factor=backoff_factor,
         requests_args=requests_args,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        disk_cache_path=disk_cache_path,
+        host=host,
+        executor_workers=executor_workers,
+        trending_poll_interval=trending_poll_interval,
     )
     if not app.agent:
         logger.warning(
@@ -179,9 +213,59 @@ def load_agent_on_start(
             retries=RETRIES,
             backoff_factor=BACKOFF_FACTOR,
             requests_args=REQUEST_ARGS,
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
         )
 
+    app.agent.start_trending_poller(loop)
     return app.agent
 
+
+def trending_poll_interval_or_default(interval: Optional[float]) -> float:
+    """Seconds between two refreshes of the trending snapshot, 0 to disable it.
+    Taken from `interval`, then the environment variable
+    constants.ENV_TRENDING_POLL_INTERVAL, then the default."""
+    if interval is not None:
+        return interval
+    env_value = os.environ.get(ENV_TRENDING_POLL_INTERVAL)
+    if env_value is None:
+        return DEFAULT_TRENDING_POLL_INTERVAL
+    try:
+        return float(env_value)
+    except ValueError:
+        logger.error(
+            f"Cannot convert environment variable `{ENV_TRENDING_POLL_INTERVAL}` "
+            f"to float ('{env_value}')."
+        )
+        return DEFAULT_TRENDING_POLL_INTERVAL
+
+
+async def close_agent_on_stop(app: Sanic, loop: Text) -> None:
+    """Close the agent's HTTP connections.
+    Used to be scheduled on server stop
+    (hence the `app` and `loop` arguments)."""
+    if app.agent:
+        await app.agent.close()
+
 if __name__ == '__main__':
-    serve_application()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Start the trends server.")
+    parser.add_argument(
+        "--executor-workers",
+        type=int,
+        default=None,
+        help="Threads decoding and parsing Google Trends responses "
+             f"(default: ${ENV_AGENT_EXECUTOR_WORKERS} or the thread pool's default).",
+    )
+    parser.add_argument(
+        "--trending-poll-interval",
+        type=float,
+        default=None,
+        help="Seconds between refreshes of the trending stories served by "
+             f"/get_trend_article, 0 to fetch them per request (default: "
+             f"${ENV_TRENDING_POLL_INTERVAL} or {DEFAULT_TRENDING_POLL_INTERVAL}).",
+    )
+    args = parser.parse_args()
+    serve_application(
+        executor_workers=args.executor_workers,
+        trending_poll_interval=args.trending_poll_interval,
+    )
\ No newline at end of file
@@ -169,9 +169,25 @@ def create_app(
 
         return response.text('OK')
 
+    @app.get("/status")
+    @ensure_loaded_agent(app)
+    def executor_status(request: Request):
+        """Report the agent's executor: workers and queued, running, completed
+        and cancelled calls."""
+
+        return response.json(app.agent.executor_stats())
+
     @app.get("/get_trend_article")
     @ensure_loaded_agent(app)
     async def get_trend_article(request: Request):
+        snapshot = app.agent.trending_snapshot()
+        if snapshot is not None:
+            # the poller's latest stories, already encoded, and their age in seconds
+            return response.raw(
+                snapshot.body,
+                content_type="application/json",
+                headers={"Age": str(int(snapshot.age))},
+            )
         try:
             response_data = await app.agent.realtime_trending_searches()
             return response.json(response_data)
@@ -183,4 +199,25 @@ def create_app(
                 f"An unexpected error occurred during searching. Error: {e}",
             )
     
+    @app.get("/get_trend_changes")
+    @ensure_loaded_agent(app)
+    def get_trend_changes(request: Request):
+        """Trending stories added, removed and reranked since the refresh
+        `since`; pass the returned `seq` as `since` on the next call."""
+        try:
+            since = int(request.args.get("since", 0))
+        except ValueError:
+            raise ErrorResponse(
+                400, "BadRequest", "Parameter `since` must be an integer."
+            )
+        changes = app.agent.trending_changes(since)
+        if changes is None:
+            raise ErrorResponse(
+                HTTPStatus.CONFLICT,
+                "Conflict",
+                "Trending stories are not polled, start the server with a "
+                "trending poll interval above 0.",
+            )
+        return response.json(changes)
+
     return app
@@ -0,0 +1,549 @@
+import asyncio
+import copy
+import logging
+import time
+from datetime import datetime
+from http.cookiejar import DefaultCookiePolicy
+
+import httpx
+from urllib.parse import quote
+from pytrends import exceptions
+
+from utils.constants import (
+    GET_METHOD,
+    GOOGLE_COOKIE_URL,
+    COOKIE_REJECTED_CODES,
+    WIDGET_TOKEN_REJECTED_CODES,
+    GENERAL_URL,
+    INTEREST_OVER_TIME_URL,
+    INTEREST_BY_REGION_URL,
+    RELATED_QUERIES_URL,
+    RELATED_MAX_WORKERS,
+    BULK_MAX_WORKERS,
+    TRENDING_SEARCHES_URL,
+    TODAY_SEARCHES_URL,
+    REALTIME_TRENDING_SEARCHES_URL,
+    TOP_CHARTS_URL,
+    SUGGESTIONS_URL,
+    CATEGORIES_URL
+)
+from service.trending import TrendReq
+from service.payload import TrendPayload
+from service.single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTrendReq(TrendReq):
+    """
+    Google Trends API on a non-blocking HTTP client
+
+    Same method surface as `TrendReq`, every request method is a coroutine.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize default values for params, see `TrendReq`
+        """
+        # one pooled client per proxy, created on first use
+        self._clients = dict()
+        # background cookie refreshes, referenced until they finish
+        self._background_tasks = set()
+        # decoding and parsing run on the event loop unless given an executor
+        self.executor = kwargs.pop('executor', None)
+        super(AsyncTrendReq, self).__init__(*args, **kwargs)
+        self._in_flight = AsyncSingleFlight()
+
+    def _create_session(self):
+        return None
+
+    async def _offload(self, fn, *args, **kwargs):
+        """Run the blocking `fn` on the executor, inline when there is none"""
+        if self.executor is None:
+            return fn(*args, **kwargs)
+        return await self.executor.run(fn, *args, **kwargs)
+
+    def _load_cookies(self):
+        # fetched on the first request, we may not be inside the event loop yet
+        return None
+
+    def _client(self, proxy=None):
+        """
+        Return the pooled client sending requests through `proxy`
+        """
+        client = self._clients.get(proxy)
+        if client is None:
+            if isinstance(self.timeout, tuple):
+                timeout = httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+            else:
+                timeout = httpx.Timeout(self.timeout)
+            transport = httpx.AsyncHTTPTransport(
+                # httpx 0.23 transports only take a Proxy, not its URL
+                proxy=httpx.Proxy(proxy) if proxy else None,
+                verify=self.requests_args.get('verify', True),
+                cert=self.requests_args.get('cert'),
+                retries=self.retries,
+                limits=httpx.Limits(
+                    max_connections=self.pool_connections * self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize
+                )
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=timeout,
+                headers={'accept-language': self.hl,
+                         **self.requests_args.get('headers', {})}
+            )
+            # cookies are passed explicitly per request
+            client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            self._clients[proxy] = client
+        return client
+
+    async def close(self):
+        """
+        Release the pooled connections held by the clients
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+        if self.disk_cache is not None:
+            await self._offload(self.disk_cache.close)
+
+    async def _cookies(self, proxy):
+        """
+        Return the NID cookie of `proxy` from the cache, fetching it on a miss
+        and refreshing it in the background when it is about to expire
+        """
+        key = self._cookie_key(proxy)
+        cookies, refresh = self.cookie_cache.lookup(key)
+        if cookies is None:
+            # concurrent requests missing the same cookie share one fetch
+            return await self._in_flight.do(('cookie',) + key, self.GetGoogleCookie, proxy)
+        if refresh:
+            self._schedule_cookie_refresh(proxy)
+        return cookies
+
+    def _schedule_cookie_refresh(self, proxy):
+        task = asyncio.ensure_future(self._refresh_cookie(proxy))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh_cookie(self, proxy):
+        try:
+            await self.GetGoogleCookie(proxy)
+        except Exception:
+            self.cookie_cache.release(self._cookie_key(proxy))
+
+    async def GetGoogleCookie(self, proxy=None):
+        """
+        Gets google cookie through `proxy` and stores it in the cookie cache
+        """
+        response = await self._client(proxy).get(
+            self._url(GOOGLE_COOKIE_URL.format(geo=self.hl[-2:])))
+        cookies = dict(filter(lambda i: i[0] == 'NID', response.cookies.items()))
+        self.cookie_cache.put(self._cookie_key(proxy), cookies)
+        return cookies
+
+    async def _cached_response(self, endpoint, key, cache_ttl=None):
+        """
+        Return `(hit, req_json)` from the response cache, falling back to the
+        disk cache, read off the event loop
+        """
+        memory_ttl = self._memory_cache_ttl(endpoint, cache_ttl)
+        if memory_ttl:
+            hit, req_json = self.response_cache.get(endpoint, key)
+            if hit:
+                return True, req_json
+        if self._disk_cache_ttl(endpoint, cache_ttl):
+            hit, req_json, remaining = await self._offload(self.disk_cache.get, key)
+            if hit:
+                if memory_ttl:
+                    self.response_cache.put(endpoint, key, req_json,
+                                            min(memory_ttl, remaining))
+                return True, req_json
+        return False, None
+
+    async def _cache_response(self, endpoint, key, req_json, cache_ttl=None):
+        memory_ttl = self._memory_cache_ttl(endpoint, cache_ttl)
+        if memory_ttl:
+            self.response_cache.put(endpoint, key, req_json, memory_ttl)
+        disk_ttl = self._disk_cache_ttl(endpoint, cache_ttl)
+        if disk_ttl:
+            await self._offload(self.disk_cache.put, endpoint, key, req_json, disk_ttl)
+
+    async def _get_data(self,
+                url,
+                method=GET_METHOD,
+                trim_chars=0,
+                bypass_cache=False,
+                cache_ttl=None,
+                **kwargs):
+        """Send a request to Google and return the JSON response as a Python object
+        :param url: the url to which the request will be sent
+        :param method: the HTTP method ('get' or 'post')
+        :param trim_chars: how many characters should be trimmed off the beginning of the content of the response
+            before this is passed to the JSON parser
+        :param bypass_cache: skip the response cache lookup, the fresh response is still cached
+        :param cache_ttl: seconds to cache the response for, defaults to the endpoint's TTL
+        :param kwargs: any extra key arguments passed to the request builder (usually query parameters or data)
+        :return:
+        """
+        endpoint = self._endpoint(url)
+        key = self._request_key(url, method, trim_chars, kwargs)
+        if not bypass_cache:
+            hit, req_json = await self._cached_response(endpoint, key, cache_ttl)
+            if hit:
+                return req_json
+        # identical requests in flight at the same time share one upstream call
+        req_json = await self._in_flight.do(
+            key, self._fetch_data, url, method, trim_chars, **kwargs)
+        await self._cache_response(endpoint, key, req_json, cache_ttl)
+        return req_json
+
+    async def _fetch_data(self, url, method, trim_chars, **kwargs):
+        """Send the request of `_get_data`, failing over between proxies"""
+        # a proxy that cannot be reached is quarantined and the next one is tried
+        attempts = len(self.proxy_pool) if self.proxy_pool is not None else 1
+        endpoint = self._endpoint(url)
+        for attempt in range(attempts):
+            proxy = self._acquire_proxy()
+            delay = self._rate_limit_delay(endpoint, proxy)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = time.monotonic()
+            response = None
+            error = False
+            try:
+                response = await self._request(url, method, proxy, **kwargs)
+                if response.status_code in COOKIE_REJECTED_CODES:
+                    # Google rejected the cookie: drop it and try once more with a new one
+                    self.cookie_cache.invalidate(self._cookie_key(proxy))
+                    response = await self._request(url, method, proxy, **kwargs)
+            except httpx.TransportError:
+                error = True
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except Exception:
+                error = True
+                raise
+            finally:
+                # the lease ends whatever happens, a cancelled request is not held against the proxy
+                if response is None:
+                    self._release_proxy(proxy, error=error)
+                else:
+                    self._release_proxy(proxy, latency=time.monotonic() - start,
+                                        status=response.status_code, error=error)
+            self._rate_limit_feedback(endpoint, proxy, response)
+            return await self._offload(self._response_json, response, trim_chars)
+
+    async def _request(self, url, method, proxy, **kwargs):
+        """Send a single request through `proxy` with its cached cookie"""
+        cookies = await self._cookies(proxy)
+        headers = dict()
+        if cookies:
+            headers['cookie'] = '; '.join(
+                '{}={}'.format(k, v) for k, v in cookies.items())
+        return await self._client(proxy).request(
+            method.upper(), self._url(url), headers=headers, **kwargs)
+
+    async def build_payload(self,
+                    kw_list,
+                    cat=0,
+                    timeframe='today 5-y',
+                    geo='',
+                    gprop=''):
+        """Create the payload for related queries, interest over time and interest by region, see `TrendReq`"""
+        return self._use_payload(await self._explore(kw_list, cat, timeframe, geo, gprop))
+
+    async def _explore(self, kw_list, cat, timeframe, geo, gprop):
+        """Request the widget tokens of a query and return its payload"""
+        token_payload = self._token_payload(kw_list, cat, timeframe, geo, gprop)
+        # get tokens, remembering whether they were cached to renew only those
+        cached, req_json = await self._cached_response(self._endpoint(GENERAL_URL),
+                                                       self._explore_key(token_payload))
+        if not cached:
+            req_json = await self._get_data(
+                url=GENERAL_URL,
+                method=GET_METHOD,
+                bypass_cache=True,
+                params=token_payload,
+                trim_chars=4,
+            )
+        return TrendPayload.from_widgets(kw_list, cat, timeframe, geo or self.geo,
+                                         gprop, token_payload, req_json['widgets'], cached)
+
+    async def _with_tokens(self, payload, fetch):
+        """Return `await fetch(payload)`, renewing the payload's cached tokens once if Google rejects them"""
+        try:
+            return await fetch(payload)
+        except exceptions.ResponseError as e:
+            if (not payload.cached or e.response is None
+                    or e.response.status_code not in WIDGET_TOKEN_REJECTED_CODES):
+                raise
+        return await fetch(await self._renew_payload(payload))
+
+    async def _renew_payload(self, payload):
+        """Drop the cached tokens of `payload` and return the payload explored again"""
+        self.response_cache.invalidate(self._explore_key(payload.token_payload))
+        renewed = await self._explore(payload.kw_list, payload.cat, payload.timeframe,
+                                      payload.geo, payload.gprop)
+        if payload is self.payload:
+            self._use_payload(renewed)
+        return renewed
+
+    async def interest_over_time(self, compact=False, raw=False, payload=None):
+        """Request data from Google's Interest Over Time section and return a dataframe"""
+        payload = self._payload(payload)
+        req_json = await self._with_tokens(payload, self._interest_over_time_json)
+        if compact:
+            from service.interest_store import InterestSeries
+
+            return await self._offload(InterestSeries.from_timeline,
+                                       req_json['default']['timelineData'], payload.kw_list)
+        return await self._offload(self._parse_interest_over_time, req_json, payload.kw_list, raw)
+
+    async def _interest_over_time_json(self, payload):
+        return await self._get_data(
+            url=INTEREST_OVER_TIME_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=self._interest_over_time_payload(payload.interest_over_time_widget),
+        )
+
+    async def interest_over_time_of(self,
+                            kw_list,
+                            cat=0,
+                            timeframe='today 5-y',
+                            geo='',
+                            gprop='',
+                            raw=False):
+        """Request the interest over time of `kw_list` without touching the instance's payload"""
+        req_json = await self._window_timeline(kw_list, cat, timeframe, geo, gprop)
+        return await self._offload(self._parse_interest_over_time, req_json, kw_list, raw)
+
+    async def bulk_interest_over_time(self,
+                                keywords,
+                                anchor=None,
+                                cat=0,
+                                timeframe='today 5-y',
+                                geo='',
+                                gprop='',
+                                max_workers=BULK_MAX_WORKERS,
+                                raw=False):
+        """Request the interest over time of any number of keywords on one scale and return a dataframe"""
+        groups = self._keyword_groups(keywords, anchor)
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+        async def fetch(group):
+            async with semaphore:
+                return await self._window_timeline(group, cat, timeframe, geo, gprop)
+
+        responses = await asyncio.gather(*(fetch(group) for group in groups))
+        return await self._offload(self._parse_bulk_interest_over_time, groups, responses, raw)
+
+    async def interest_by_region(self,
+                        resolution='COUNTRY',
+                        inc_low_vol=False,
+                        inc_geo_code=False,
+                        dtype='int64',
+                        raw=False,
+                        payload=None):
+        """Request data from Google's Interest by Region section and return a dataframe
+
+        Values range from 0 to 100, `dtype='uint8'` stores them in an eighth of the memory
+        """
+        payload = self._payload(payload)
+
+        async def fetch(payload):
+            return await self._get_data(
+                url=INTEREST_BY_REGION_URL,
+                method=GET_METHOD,
+                trim_chars=5,
+                params=self._interest_by_region_payload(payload, resolution, inc_low_vol),
+            )
+
+        req_json = await self._with_tokens(payload, fetch)
+        return await self._offload(self._parse_interest_by_region, req_json, inc_geo_code,
+                                   dtype, raw, payload.kw_list)
+
+    async def related_topics(self, max_workers=RELATED_MAX_WORKERS, raw=False, payload=None):
+        """Request data from Google's Related Topics section and return a dictionary of dataframes"""
+        payload = self._payload(payload)
+        result_dict = dict()
+        related_json = await self._with_tokens(
+            payload, lambda payload: self._related_json(payload.related_topics_widgets, max_workers))
+        for kw, req_json in related_json:
+            result_dict[kw] = await self._offload(self._parse_related_topics, req_json, raw)
+        return result_dict
+
+    async def related_queries(self, max_workers=RELATED_MAX_WORKERS, raw=False, payload=None):
+        """Request data from Google's Related Queries section and return a dictionary of dataframes"""
+        payload = self._payload(payload)
+        result_dict = dict()
+        related_json = await self._with_tokens(
+            payload, lambda payload: self._related_json(payload.related_queries_widgets, max_workers))
+        for kw, req_json in related_json:
+            result_dict[kw] = await self._offload(self._parse_related_queries, req_json, raw)
+        return result_dict
+
+    async def _related_json(self, widget_list, max_workers):
+        """Request related widgets concurrently, return `(keyword, response)` pairs in widget order"""
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+        async def fetch(request_json):
+            kw, related_payload = self._related_payload(request_json)
+            async with semaphore:
+                return kw, await self._get_data(
+                    url=RELATED_QUERIES_URL,
+                    method=GET_METHOD,
+                    trim_chars=5,
+                    params=related_payload,
+                )
+
+        return await asyncio.gather(*(fetch(request_json) for request_json in list(widget_list)))
+
+    async def trending_searches(self, pn='united_states', bypass_cache=False, raw=False):
+        """Request data from Google's Hot Searches section and return a dataframe"""
+        req_json = await self._get_data(
+            url=TRENDING_SEARCHES_URL,
+            method=GET_METHOD,
+            bypass_cache=bypass_cache,
+        )
+        return await self._offload(self._parse_trending_searches, req_json, raw)
+
+    async def today_searches(self,
+                    pn='VN',
+                    bypass_cache=False,
+                    raw=False):
+        """Request data from Google Daily Trends section and returns a dataframe"""
+        req_json = await self._today_searches_json(pn, bypass_cache)
+        return await self._offload(self._parse_today_searches, req_json, raw)
+
+    async def daily_trends(self,
+                    pn='VN',
+                    bypass_cache=False,
+                    as_dataframe=False):
+        """Request every day of Google Daily Trends and return a generator of one record per trend"""
+        records = self._daily_trends_records(await self._today_searches_json(pn, bypass_cache))
+        if as_dataframe:
+            return await self._offload(self._daily_trends_frame, records)
+        return records
+
+    async def _today_searches_json(self, pn, bypass_cache):
+        return await self._get_data(
+            url=TODAY_SEARCHES_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=self._today_searches_payload(pn),
+            bypass_cache=bypass_cache,
+        )
+
+    async def realtime_trending_searches(self,
+                                pn='VN',
+                                cat='m',
+                                count=300,
+                                bypass_cache=False):
+        """
+        Request data from Google Realtime Search Trends section and returns a
+        dataframe, the stories share the cached response and must not be mutated
+        """
+        req_json = await self._get_data(
+            url=REALTIME_TRENDING_SEARCHES_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=self._realtime_trending_searches_payload(pn, cat, count),
+            bypass_cache=bypass_cache
+        )
+        return await self._offload(self._parse_realtime_trending_searches, req_json)
+
+    async def top_charts(self,
+                date,
+                hl='vi-vn',
+                tz=300,
+                geo='GLOBAL',
+                bypass_cache=False,
+                raw=False):
+        """Request data from Google's Top Charts section and return a dataframe, a copied list with `raw`"""
+        chart_payload = self._top_charts_payload(date, hl, tz, geo)
+        req_json = await self._get_data(
+            url=TOP_CHARTS_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=chart_payload,
+            bypass_cache=bypass_cache,
+            cache_ttl=self._top_charts_cache_ttl(chart_payload['date']),
+        )
+        return await self._offload(self._parse_top_charts, req_json, raw)
+
+    async def suggestions(self, keyword, bypass_cache=False):
+        """Request data from Google's Keyword Suggestion dropdown and return a copy of the topics"""
+        req_json = await self._get_data(
+            url=SUGGESTIONS_URL + quote(keyword),
+            params={'hl': self.hl},
+            method=GET_METHOD,
+            trim_chars=5,
+            bypass_cache=bypass_cache,
+        )
+        return copy.deepcopy(req_json['default']['topics'])
+
+    async def categories(self, bypass_cache=False):
+        """Request available categories data from Google's API and return a copy of the dictionary"""
+        req_json = await self._get_data(
+            url=CATEGORIES_URL,
+            params={'hl': self.hl},
+            method=GET_METHOD,
+            trim_chars=5,
+            bypass_cache=bypass_cache,
+        )
+        return await self._offload(copy.deepcopy, req_json)
+
+    async def get_historical_interest(self, keywords, year_start=2018, month_start=1,
+                                day_start=1, hour_start=0, year_end=2018,
+                                month_end=2, day_end=1, hour_end=0, cat=0,
+                                geo='', gprop='', sleep=0, frequency='hourly',
+                                max_workers=1, checkpoint_path=None):
+        """Gets historical hourly data for interest by chunking requests to 1 week at a time (which is what Google allows)
+
+        Every window is planned up front and fetched with up to `max_workers`
+        requests in flight, a window starts at most every `sleep` seconds.
+        Windows are checkpointed to `checkpoint_path` as in `TrendReq`.
+        """
+        initial_start_date = datetime(year_start, month_start,
+                                      day_start, hour_start)
+        end_date = datetime(year_end, month_end, day_end, hour_end)
+        timeframes = list(self._historical_timeframes(initial_start_date,
+                                                      end_date,
+                                                      frequency))
+        # the checkpoint store is SQLite, it is read and written off the event loop
+        store, pull, windows = await self._offload(self._open_checkpoint, checkpoint_path,
+                                                   keywords, cat, geo, gprop, timeframes)
+        pending = [tf for tf in timeframes if tf not in windows]
+        semaphore = asyncio.Semaphore(max_workers)
+        started = time.monotonic()
+
+        async def fetch(i, tf):
+            async with semaphore:
+                delay = started + i * sleep - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    windows[tf] = await self._window_timeline(keywords, cat, tf, geo, gprop)
+                except Exception as e:
+                    logger.warning('window %s failed: %s', tf, e)
+                    return
+            if store is not None:
+                await self._offload(store.put, pull, tf, windows[tf])
+
+        try:
+            await asyncio.gather(*(fetch(i, tf) for i, tf in enumerate(pending)))
+        finally:
+            if store is not None:
+                await self._offload(store.close)
+        return await self._offload(self._historical_result, keywords, timeframes,
+                                   windows, initial_start_date, end_date)
+
+    async def _window_timeline(self, kw_list, cat, timeframe, geo, gprop):
+        """Request the interest over time of one timeframe without storing its payload or widgets"""
+        payload = await self._explore(kw_list, cat, timeframe, geo, gprop)
+        return await self._with_tokens(payload, self._interest_over_time_json)
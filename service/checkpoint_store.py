@@ -0,0 +1,67 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore(object):
+    """
+    SQLite store of the windows fetched by `TrendReq.get_historical_interest`
+
+    Each window's decoded interest over time response is stored as soon as it
+    is fetched, under the pull it belongs to (keywords, category, geo,
+    property and timezone, see `pull_key`) and its timeframe. Re-running an
+    interrupted or partly failed pull only fetches the windows still missing.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS windows ('
+                'pull TEXT NOT NULL, '
+                'timeframe TEXT NOT NULL, '
+                'value TEXT NOT NULL, '
+                'fetched_at REAL NOT NULL, '
+                'PRIMARY KEY (pull, timeframe))'
+            )
+
+    @staticmethod
+    def pull_key(keywords, cat, geo, gprop, tz):
+        return json.dumps([list(keywords), cat, geo, gprop, tz])
+
+    def get_many(self, pull, timeframes):
+        """
+        Return the stored responses of `timeframes` as a dict by timeframe
+        """
+        timeframes = list(timeframes)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT timeframe, value FROM windows WHERE pull = ? '
+                'AND timeframe IN ({})'.format(', '.join('?' * len(timeframes))),
+                [pull] + timeframes
+            ).fetchall() if timeframes else []
+        return {timeframe: json.loads(value) for timeframe, value in rows}
+
+    def put(self, pull, timeframe, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO windows (pull, timeframe, value, fetched_at) '
+                'VALUES (?, ?, ?, ?)',
+                (pull, timeframe, json.dumps(value), time.time())
+            )
+
+    def clear(self, pull=None):
+        """
+        Drop the windows of `pull`, every window when not given
+        """
+        with self._lock, self._conn:
+            if pull is None:
+                self._conn.execute('DELETE FROM windows')
+            else:
+                self._conn.execute('DELETE FROM windows WHERE pull = ?', (pull,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+class CookieCache(object):
+    """
+    Google NID cookies keyed by (proxy, hl, geo)
+
+    An entry is served until `ttl` seconds after it was fetched. Once it is
+    older than `ttl - refresh_ahead`, the first lookup also asks its caller to
+    refresh it in the background, so requests keep using the current cookie
+    while a new one is fetched.
+    """
+    def __init__(self, ttl=1800, refresh_ahead=300):
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self._entries = dict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        """
+        Return `(cookies, refresh)` for `key`
+
+        `cookies` is None when there is no live entry. `refresh` is True for
+        exactly one caller once the entry is due for a background refresh;
+        that caller must end it with `put` or `release`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            cookies, fetched_at = entry
+            age = now - fetched_at
+            if age >= self.ttl:
+                del self._entries[key]
+                return None, False
+            refresh = age >= self.ttl - self.refresh_ahead and key not in self._refreshing
+            if refresh:
+                self._refreshing.add(key)
+            return cookies, refresh
+
+    def put(self, key, cookies):
+        with self._lock:
+            self._entries[key] = (cookies, time.monotonic())
+            self._refreshing.discard(key)
+
+    def release(self, key):
+        """
+        Give up a background refresh, the next due lookup will claim it again
+        """
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, key):
+        """
+        Drop the cookie of `key`, e.g. after Google rejected it
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
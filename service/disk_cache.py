@@ -0,0 +1,93 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+
+
+class DiskCache(object):
+    """
+    SQLite store of decoded Google responses that survives restarts
+
+    `ttls` maps an endpoint URL to the seconds its responses are kept,
+    responses of endpoints missing from it are never stored. An infinite TTL
+    stores a response without expiry. Keys are the request keys built by
+    `TrendReq._request_key`.
+    """
+    def __init__(self, path, ttls):
+        self.path = path
+        self.ttls = dict(ttls)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, '
+                'endpoint TEXT NOT NULL, '
+                'value TEXT NOT NULL, '
+                'expires_at REAL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS responses_expires_at '
+                'ON responses (expires_at)'
+            )
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, 0)
+
+    @staticmethod
+    def _remaining(expires_at, now):
+        return math.inf if expires_at is None else expires_at - now
+
+    def get(self, key):
+        """
+        Return `(hit, value, remaining)` for the response stored under `key`,
+        `remaining` being the seconds left before it expires
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM responses WHERE key = ? '
+                'AND (expires_at IS NULL OR expires_at > ?)',
+                (json.dumps(list(key)), now)
+            ).fetchone()
+        if row is None:
+            return False, None, 0
+        return True, json.loads(row[0]), self._remaining(row[1], now)
+
+    def put(self, endpoint, key, value, ttl=None):
+        """
+        Store `value` for `ttl` seconds, the endpoint's TTL when not given
+        """
+        ttl = self.ttl(endpoint) if ttl is None else ttl
+        if not ttl:
+            return
+        expires_at = None if math.isinf(ttl) else time.time() + ttl
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, endpoint, value, expires_at) '
+                'VALUES (?, ?, ?, ?)',
+                (json.dumps(list(key)), endpoint, json.dumps(value), expires_at)
+            )
+
+    def load(self):
+        """
+        Drop expired responses and return every live one as
+        `(endpoint, key, value, remaining)` tuples, used to warm memory caches
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                (now,)
+            )
+            rows = self._conn.execute(
+                'SELECT endpoint, key, value, expires_at FROM responses'
+            ).fetchall()
+        return [(endpoint, tuple(json.loads(key)), json.loads(value),
+                 self._remaining(expires_at, now))
+                for endpoint, key, value, expires_at in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MeteredExecutor(object):
+    """
+    Thread pool running blocking work (JSON decoding, pandas parsing) off the
+    event loop, with queue metrics
+
+    Cancelling the awaiting coroutine, e.g. when the client disconnects,
+    drops its call if it is still queued. A call already running finishes in
+    its thread and its result is discarded.
+    """
+    def __init__(self, max_workers=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix='agent')
+        self.max_workers = self._pool._max_workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+        future = self._pool.submit(self._call, fn, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+                    self.cancelled += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
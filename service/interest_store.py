@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+def timeline_arrays(timeline, n_kw, dtype='int64'):
+    """
+    Return the epoch seconds, the `(points, n_kw)` value matrix and the partial
+    flags of Google's `timelineData`, sorted by time, in one pass over the points
+    """
+    times = np.array([point['time'] for point in timeline], dtype='float64')
+    values = np.array([point['value'][:n_kw] for point in timeline], dtype=dtype)
+    partial = np.array([point.get('isPartial') is True for point in timeline], dtype=bool)
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order].reshape(len(timeline), n_kw), partial[order]
+
+
+class InterestSeries(object):
+    """
+    Interest over time of a set of keywords, in a compact form
+
+    Values (0 to 100) are a uint8 matrix with a column per keyword, times are
+    uint32 epoch seconds and the partial flags are packed 8 to a byte. That is
+    about 9 bytes per point for 5 keywords where the DataFrame of
+    `TrendReq.interest_over_time` takes 49. The arrays may be memory-mapped
+    from a directory written by `save`, `to_frame` builds the DataFrame when
+    it is needed.
+    """
+    def __init__(self, keywords, times, values, partial):
+        self.keywords = list(keywords)
+        self.times = times
+        self.values = values
+        self.partial = partial
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_timeline(cls, timeline, keywords):
+        """Build the series straight from Google's `timelineData`"""
+        times, values, partial = timeline_arrays(timeline, len(keywords), 'uint8')
+        return cls(keywords, times.astype('uint32'), values, np.packbits(partial))
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the series from a DataFrame returned by `interest_over_time`"""
+        keywords = [column for column in df.columns if column != 'isPartial']
+        times = df.index.values.astype('datetime64[s]').astype('int64').astype('uint32')
+        if 'isPartial' in df:
+            partial = df['isPartial'].to_numpy(dtype=bool)
+        else:
+            partial = np.zeros(len(df), dtype=bool)
+        return cls(keywords, times, df[keywords].to_numpy(dtype='uint8'), np.packbits(partial))
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes + self.partial.nbytes
+
+    def partial_flags(self):
+        return np.unpackbits(self.partial, count=len(self)).astype(bool)
+
+    def to_frame(self, dtype='int64'):
+        """Return the DataFrame `interest_over_time` returns for the same response"""
+        import pandas as pd
+
+        index = pd.DatetimeIndex(
+            pd.to_datetime(self.times.astype('float64'), unit='s'), name='date')
+        df = pd.DataFrame(np.asarray(self.values, dtype=dtype),
+                          index=index, columns=list(self.keywords))
+        df['isPartial'] = self.partial_flags()
+        return df
+
+    def save(self, path):
+        """Write the series to the directory `path` as .npy files that `load` can memory-map"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'times.npy'), self.times)
+        np.save(os.path.join(path, 'values.npy'), self.values)
+        np.save(os.path.join(path, 'partial.npy'), self.partial)
+        with open(os.path.join(path, 'keywords.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.keywords, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read a series written by `save`, its arrays memory-mapped read-only unless `mmap` is false"""
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, 'keywords.json'), encoding='utf-8') as f:
+            keywords = json.load(f)
+        return cls(keywords,
+                   np.load(os.path.join(path, 'times.npy'), mmap_mode=mmap_mode),
+                   np.load(os.path.join(path, 'values.npy'), mmap_mode=mmap_mode),
+                   np.load(os.path.join(path, 'partial.npy')))
+
+
+class InterestStore(object):
+    """
+    Directory of `InterestSeries` by key, each memory-mapped when read
+
+    Keys are any JSON serializable value, e.g. `(keywords, timeframe, geo)`.
+    A series is written to a temporary directory first so readers never see
+    it half written.
+    """
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode('utf-8'))
+        return os.path.join(self.root, digest.hexdigest())
+
+    def __contains__(self, key):
+        return os.path.isdir(self._path(key))
+
+    def get(self, key, mmap=True):
+        """Return the series stored under `key`, None when there is none"""
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+        return InterestSeries.load(path, mmap=mmap)
+
+    def put(self, key, series):
+        path = self._path(key)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        series.save(tmp_path)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
@@ -0,0 +1,41 @@
+import json
+from json.decoder import WHITESPACE
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_decoder = json.JSONDecoder()
+
+
+def charset(content_type):
+    """Return the charset of a Content-Type header, JSON defaults to UTF-8"""
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return 'utf-8'
+
+
+def loads_trimmed(content, trim_chars=0, encoding='utf-8'):
+    """Parse the JSON document found after the first `trim_chars` bytes of `content`
+
+    Google prefixes most responses with garbage like ")]}'," which is skipped
+    through an offset rather than by slicing a copy of the body. orjson parses
+    a memoryview of the raw bytes when it is installed, otherwise the bytes are
+    decoded once and the stdlib decoder starts at the offset.
+    :param content: the raw response body
+    :param trim_chars: how many leading characters (ASCII, so bytes) to skip
+    :param encoding: charset of the body
+    """
+    if orjson is not None and encoding.lower().replace('-', '') == 'utf8':
+        try:
+            return orjson.loads(memoryview(content)[trim_chars:])
+        except orjson.JSONDecodeError:
+            # the stdlib decoder below raises the error if it fails as well
+            pass
+    text = content.decode(encoding)
+    obj, _ = _decoder.raw_decode(text, WHITESPACE.match(text, trim_chars).end())
+    return obj
@@ -0,0 +1,64 @@
+class TrendPayload(object):
+    """
+    Query built by `TrendReq.build_payload`, with the widget tokens Google
+    returned for it
+
+    Immutable, so one payload may be shared by concurrent requests and a
+    `TrendReq` may serve several queries at once: pass the payload to
+    `interest_over_time`, `interest_by_region`, `related_topics` and
+    `related_queries`. Widgets are Google's dicts as decoded, possibly shared
+    with the response cache, they are read and never modified. `cached` is
+    whether the tokens came from the response cache rather than from Google.
+    """
+    __slots__ = ('kw_list', 'cat', 'timeframe', 'geo', 'gprop', 'token_payload',
+                 'interest_over_time_widget', 'interest_by_region_widget',
+                 'related_topics_widgets', 'related_queries_widgets', 'cached')
+
+    def __init__(self, kw_list, cat, timeframe, geo, gprop, token_payload,
+                 interest_over_time_widget=None, interest_by_region_widget=None,
+                 related_topics_widgets=(), related_queries_widgets=(), cached=False):
+        set_attr = super(TrendPayload, self).__setattr__
+        set_attr('kw_list', tuple(kw_list))
+        set_attr('cat', cat)
+        set_attr('timeframe', timeframe)
+        set_attr('geo', geo)
+        set_attr('gprop', gprop)
+        set_attr('token_payload', dict(token_payload))
+        set_attr('interest_over_time_widget', interest_over_time_widget)
+        set_attr('interest_by_region_widget', interest_by_region_widget)
+        set_attr('related_topics_widgets', tuple(related_topics_widgets))
+        set_attr('related_queries_widgets', tuple(related_queries_widgets))
+        set_attr('cached', cached)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TrendPayload is immutable, build a new one')
+
+    def __delattr__(self, name):
+        raise AttributeError('TrendPayload is immutable, build a new one')
+
+    def __repr__(self):
+        return 'TrendPayload(kw_list={!r}, cat={!r}, timeframe={!r}, geo={!r}, gprop={!r})'.format(
+            list(self.kw_list), self.cat, self.timeframe, self.geo, self.gprop)
+
+    @classmethod
+    def from_widgets(cls, kw_list, cat, timeframe, geo, gprop, token_payload, widget_dicts,
+                     cached=False):
+        """Build the payload from the widgets returned by the explore endpoint"""
+        interest_over_time_widget = None
+        interest_by_region_widget = None
+        related_topics_widgets = []
+        related_queries_widgets = []
+        # order of the json matters...
+        for widget in widget_dicts:
+            if widget['id'] == 'TIMESERIES':
+                interest_over_time_widget = widget
+            if widget['id'] == 'GEO_MAP' and interest_by_region_widget is None:
+                interest_by_region_widget = widget
+            # response for each term, put into a list
+            if 'RELATED_TOPICS' in widget['id']:
+                related_topics_widgets.append(widget)
+            if 'RELATED_QUERIES' in widget['id']:
+                related_queries_widgets.append(widget)
+        return cls(kw_list, cat, timeframe, geo, gprop, token_payload,
+                   interest_over_time_widget, interest_by_region_widget,
+                   related_topics_widgets, related_queries_widgets, cached)
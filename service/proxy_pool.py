@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class _ProxyHealth(object):
+    """
+    Running health figures of a single proxy
+    """
+    __slots__ = ('latency', 'error_rate', 'requests', 'errors', 'rate_limited',
+                 'in_flight', 'failures', 'quarantined_until')
+
+    def __init__(self):
+        # exponentially weighted moving averages, latency in seconds
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        # consecutive failures, drives the quarantine length
+        self.failures = 0
+        self.quarantined_until = 0.0
+
+
+class ProxyPool(object):
+    """
+    Pool of proxies picking the fastest healthy one for each request
+
+    Every request leases a proxy with `acquire` and hands it back with
+    `release`, reporting its latency and outcome. Proxies are ranked by
+    latency, in-flight leases and error rate, so concurrent requests spread
+    over several proxies. A failing or rate limited proxy is quarantined for
+    `quarantine_base` seconds, doubled on each consecutive failure up to
+    `quarantine_max`, and re-admitted afterwards.
+    """
+    def __init__(self, proxies, quarantine_base=30, quarantine_max=1800,
+                 smoothing=0.3):
+        self.quarantine_base = quarantine_base
+        self.quarantine_max = quarantine_max
+        self.smoothing = smoothing
+        self._health = {proxy: _ProxyHealth() for proxy in proxies}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._health)
+
+    def _score(self, health):
+        # proxies without a measurement yet sort first so they get one
+        latency = health.latency or 0.0
+        return (latency * (1 + health.in_flight) / max(1.0 - health.error_rate, 0.05),
+                health.in_flight,
+                health.requests)
+
+    def acquire(self):
+        """
+        Lease the best available proxy
+
+        When every proxy is quarantined, the one re-admitted soonest is used
+        rather than failing the request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._health:
+                raise ValueError('The proxy pool is empty')
+            admitted = [(proxy, health) for proxy, health in self._health.items()
+                        if health.quarantined_until <= now]
+            if admitted:
+                proxy, health = min(admitted, key=lambda item: self._score(item[1]))
+            else:
+                proxy, health = min(self._health.items(),
+                                    key=lambda item: item[1].quarantined_until)
+                logger.warning('All proxies are quarantined, using {}'.format(proxy))
+            health.in_flight += 1
+            return proxy
+
+    def release(self, proxy, latency=None, status=None, error=False):
+        """
+        End a lease and record its outcome
+        :param latency: seconds the request took, when it got a response
+        :param status: HTTP status code of the response
+        :param error: True when the request failed before getting a response
+        """
+        with self._lock:
+            health = self._health.get(proxy)
+            if health is None:
+                return
+            health.in_flight = max(health.in_flight - 1, 0)
+            health.requests += 1
+            failed = error or status == 429 or (status is not None and status >= 500)
+            if status == 429:
+                health.rate_limited += 1
+            if latency is not None:
+                if health.latency is None:
+                    health.latency = latency
+                else:
+                    health.latency += self.smoothing * (latency - health.latency)
+            health.error_rate += self.smoothing * (float(failed) - health.error_rate)
+            if failed:
+                health.errors += 1
+                health.failures += 1
+                quarantine = min(self.quarantine_base * 2 ** (health.failures - 1),
+                                 self.quarantine_max)
+                health.quarantined_until = time.monotonic() + quarantine
+            else:
+                health.failures = 0
+
+    def stats(self):
+        """
+        Return a snapshot of the health of every proxy
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                proxy: {
+                    'latency': health.latency,
+                    'error_rate': health.error_rate,
+                    'requests': health.requests,
+                    'errors': health.errors,
+                    'rate_limited': health.rate_limited,
+                    'in_flight': health.in_flight,
+                    'quarantined_for': max(health.quarantined_until - now, 0.0),
+                }
+                for proxy, health in self._health.items()
+            }
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class _Bucket(object):
+    __slots__ = ('rate', 'tokens', 'updated', 'allowed', 'limited')
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.allowed = 0
+        self.limited = 0
+
+
+class RateLimiter(object):
+    """
+    Token buckets keyed by (endpoint, proxy) whose rates adapt to Google's answers
+
+    `reserve` takes a token and returns how long the caller has to wait before
+    sending, so the same instance paces threads (`time.sleep`) and tasks
+    (`asyncio.sleep`) alike. `feedback` adapts the rate of a bucket: it grows
+    by `increase` requests per second after every accepted request and is
+    multiplied by `decrease` after a 429 or quota answer (AIMD).
+    """
+    def __init__(self, rate=1.0, burst=5, min_rate=0.05, max_rate=10.0,
+                 increase=0.05, decrease=0.5):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._buckets = dict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.rate, self.burst)
+        else:
+            bucket.tokens = min(self.burst,
+                                bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+        return bucket
+
+    def reserve(self, key):
+        """
+        Take a token from the bucket of `key` and return the seconds to wait before using it
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(key, now)
+            bucket.tokens -= 1
+            if bucket.tokens >= 0:
+                return 0.0
+            return -bucket.tokens / bucket.rate
+
+    def feedback(self, key, rate_limited):
+        """
+        Adapt the rate of `key` after a response, `rate_limited` for 429 or quota answers
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(key, now)
+            if rate_limited:
+                bucket.limited += 1
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                # requests already waiting keep their turn, nothing new goes out early
+                bucket.tokens = min(bucket.tokens, 0)
+            else:
+                bucket.allowed += 1
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def state(self):
+        """
+        Return the current rate, available tokens and counters of every bucket
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    'rate': bucket.rate,
+                    'tokens': min(self.burst,
+                                  bucket.tokens + (now - bucket.updated) * bucket.rate),
+                    'allowed': bucket.allowed,
+                    'rate_limited': bucket.limited,
+                }
+                for key, bucket in self._buckets.items()
+            }
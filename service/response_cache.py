@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """
+    LRU cache of decoded Google responses with a time to live per endpoint
+
+    `ttls` maps an endpoint URL to the seconds its responses stay fresh,
+    responses of endpoints missing from it are never cached. At most
+    `max_entries` responses are kept, the least recently used goes first.
+    Cached objects are shared between callers and must not be mutated.
+    """
+    def __init__(self, ttls, max_entries=1024):
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._endpoint_stats = dict()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, 0)
+
+    def _count(self, endpoint, hit):
+        stats = self._endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        if hit:
+            self.hits += 1
+            stats['hits'] += 1
+        else:
+            self.misses += 1
+            stats['misses'] += 1
+
+    def get(self, endpoint, key):
+        """
+        Return `(hit, value)` for the response cached under `key`
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            self._count(endpoint, entry is not None)
+            if entry is None:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[0]
+
+    def put(self, endpoint, key, value, ttl=None):
+        """
+        Cache `value` for `ttl` seconds, the endpoint's TTL when not given
+        """
+        ttl = self.ttl(endpoint) if ttl is None else ttl
+        if not ttl or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        Return the hit/miss counters, overall and per endpoint, and the cache size
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'endpoints': {endpoint: dict(stats)
+                              for endpoint, stats in self._endpoint_stats.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
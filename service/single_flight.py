@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls sharing a key into a single call
+
+    The first caller of a key runs the function, callers arriving while it
+    is in flight wait for it and receive the same result (or exception).
+    The result object is shared, callers must not mutate it.
+    """
+    def __init__(self):
+        self._calls = dict()
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight(object):
+    """
+    Coalesce concurrent coroutine calls sharing a key into a single task
+
+    Waiters are shielded from each other: cancelling one caller does not
+    cancel the shared call. The result object is shared, callers must not
+    mutate it.
+    """
+    def __init__(self):
+        self._calls = dict()
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        self._calls.pop(key, None)
+        # every caller may have been cancelled, the error must not go unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        return len(self._calls)
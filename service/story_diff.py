@@ -0,0 +1,146 @@
+import bisect
+import hashlib
+import json
+import threading
+from collections import deque
+
+
+def story_key(story):
+    """
+    Stable identity of a realtime trending story
+
+    Google's story `id` when it has one, otherwise a hash of the entities it
+    is deduplicated on, or of its title.
+    """
+    key = story.get('id')
+    if key:
+        return key
+    identity = story.get('idsForDedup') or story.get('title') or story.get('entityNames')
+    digest = hashlib.sha1(json.dumps(identity, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return 'sha1:' + digest.hexdigest()
+
+
+class StoryDiff(object):
+    """
+    Changes between two consecutive lists of trending stories
+
+    `added` are the new stories in rank order, `removed` the stories gone
+    since the previous list, in their previous order, and `reranked` the
+    `(story, previous rank, rank)` of the fewest stories whose moves explain
+    the new order: a story going from first to last is the only one
+    reranked, not every story it passed. Stories shifted only because others
+    came or went are not reranked either. Ranks start at 0. Immutable.
+    """
+    __slots__ = ('seq', 'fetched_at', 'added', 'removed', 'reranked')
+
+    def __init__(self, seq, fetched_at, added, removed, reranked):
+        set_attr = super(StoryDiff, self).__setattr__
+        set_attr('seq', seq)
+        set_attr('fetched_at', fetched_at)
+        set_attr('added', tuple(added))
+        set_attr('removed', tuple(removed))
+        set_attr('reranked', tuple(reranked))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('StoryDiff is immutable')
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.reranked)
+
+    def __repr__(self):
+        return 'StoryDiff(seq={}, added={}, removed={}, reranked={})'.format(
+            self.seq, len(self.added), len(self.removed), len(self.reranked))
+
+    def to_dict(self):
+        """JSON serializable form: new stories in full, the others by key"""
+        return {
+            'seq': self.seq,
+            'fetched_at': self.fetched_at,
+            'added': list(self.added),
+            'removed': [story_key(story) for story in self.removed],
+            'reranked': [{'id': story_key(story), 'from': previous, 'to': rank}
+                         for story, previous, rank in self.reranked],
+        }
+
+
+def diff_stories(previous, stories, seq=0, fetched_at=None):
+    """
+    Return the `StoryDiff` from the `previous` to the current `stories`
+
+    Both lists are indexed by `story_key` once, a key seen twice in a list
+    keeps its first rank. The reranked stories are those outside the longest
+    run of stories of both lists kept in their previous order, O(n log n).
+    """
+    previous_ranks = dict()
+    for rank, story in enumerate(previous):
+        previous_ranks.setdefault(story_key(story), rank)
+    ranks = dict()
+    for rank, story in enumerate(stories):
+        ranks.setdefault(story_key(story), rank)
+
+    added = [stories[rank] for key, rank in ranks.items() if key not in previous_ranks]
+    removed = [previous[rank] for key, rank in previous_ranks.items() if key not in ranks]
+    # stories of both lists in their current order, the others never count as moves
+    common = [key for key in ranks if key in previous_ranks]
+    kept = _longest_increasing(common, previous_ranks)
+    reranked = [(stories[ranks[key]], previous_ranks[key], ranks[key])
+                for key in common if key not in kept]
+    return StoryDiff(seq, fetched_at, added, removed, reranked)
+
+
+def _longest_increasing(keys, ranks):
+    """Return the keys of the longest subsequence of `keys` with increasing `ranks`"""
+    tails = []  # smallest last rank of an increasing run of each length
+    tail_index = []  # index in `keys` of that last element
+    parents = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        length = bisect.bisect_left(tails, ranks[key])
+        if length == len(tails):
+            tails.append(ranks[key])
+            tail_index.append(i)
+        else:
+            tails[length] = ranks[key]
+            tail_index[length] = i
+        parents[i] = tail_index[length - 1] if length else -1
+    kept = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        kept.add(keys[i])
+        i = parents[i]
+    return kept
+
+
+class StoryTracker(object):
+    """
+    Diffs each list of trending stories against the previous one
+
+    Every `update` gets the next sequence number and its diff is kept in a
+    history of the last `history` diffs, read by consumers with
+    `changes_since`. The first update reports every story as added.
+    """
+    def __init__(self, history=100):
+        self.seq = 0
+        self._stories = ()
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def update(self, stories, fetched_at=None):
+        stories = tuple(stories)
+        with self._lock:
+            diff = diff_stories(self._stories, stories, self.seq + 1, fetched_at)
+            self.seq = diff.seq
+            self._stories = stories
+            self._history.append(diff)
+        return diff
+
+    def changes_since(self, seq=0):
+        """
+        Return the current sequence number, the diffs made after `seq`, oldest
+        first, and whether they are all of them. Not when the diffs following
+        `seq` were dropped from the history or `seq` is from before a restart:
+        the consumer has missed changes and should start over from the full list
+        """
+        with self._lock:
+            changes = [diff for diff in self._history if diff.seq > seq]
+            oldest = self._history[0].seq if self._history else self.seq + 1
+            return self.seq, changes, oldest - 1 <= seq <= self.seq
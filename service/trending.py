@@ -1,9 +1,12 @@
+import copy
 import json
+import logging
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-
-import pandas as pd
-from pandas.io.json._normalize import nested_to_record
+from http.cookiejar import DefaultCookiePolicy
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -17,6 +20,25 @@ from utils.constants import (
     POST_METHOD,
     GENERAL_URL,
     ERROR_CODES,
+    ENDPOINT_URLS,
+    GOOGLE_COOKIE_URL,
+    TRENDS_HOST,
+    COOKIE_REJECTED_CODES,
+    WIDGET_TOKEN_REJECTED_CODES,
+    COOKIE_TTL,
+    COOKIE_REFRESH_AHEAD,
+    PROXY_QUARANTINE_BASE,
+    PROXY_QUARANTINE_MAX,
+    RATE_LIMIT,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MIN,
+    RATE_LIMIT_MAX,
+    MAX_KEYWORDS,
+    RELATED_MAX_WORKERS,
+    BULK_MAX_WORKERS,
+    RESPONSE_CACHE_TTLS,
+    RESPONSE_CACHE_SIZE,
+    DISK_CACHE_TTLS,
     INTEREST_OVER_TIME_URL,
     INTEREST_BY_REGION_URL,
     RELATED_QUERIES_URL,
@@ -27,8 +49,19 @@ from utils.constants import (
     SUGGESTIONS_URL,
     CATEGORIES_URL
 )
+from service.checkpoint_store import CheckpointStore
+from service.cookie_cache import CookieCache
+from service.proxy_pool import ProxyPool
+from service.rate_limiter import RateLimiter
+from service.response_cache import ResponseCache
+from service.disk_cache import DiskCache
+from service.json_decoding import charset, loads_trimmed
+from service.payload import TrendPayload
+from service.single_flight import SingleFlight
     
 
+logger = logging.getLogger(__name__)
+
 
 class TrendReq(object):
     """
@@ -42,7 +75,20 @@ class TrendReq(object):
                 proxies='',
                 retries=0,
                 backoff_factor=0,
-                requests_args=None):
+                requests_args=None,
+                pool_connections=10,
+                pool_maxsize=10,
+                cookie_ttl=COOKIE_TTL,
+                cookie_refresh_ahead=COOKIE_REFRESH_AHEAD,
+                proxy_quarantine_base=PROXY_QUARANTINE_BASE,
+                proxy_quarantine_max=PROXY_QUARANTINE_MAX,
+                rate_limit=RATE_LIMIT,
+                rate_limit_burst=RATE_LIMIT_BURST,
+                cache_ttls=None,
+                cache_size=RESPONSE_CACHE_SIZE,
+                disk_cache_path=None,
+                disk_cache_ttls=None,
+                host=None):
         """
         Initialize default values for params
         """
@@ -58,97 +104,319 @@ class TrendReq(object):
         self.proxies = proxies  # add a proxy option
         self.retries = retries
         self.backoff_factor = backoff_factor
-        self.proxy_index = 0
         self.requests_args = requests_args or {}
-        self.cookies = self.GetGoogleCookie()
-        # intialize widget payloads
-        self.token_payload = dict()
-        self.interest_over_time_widget = dict()
-        self.interest_by_region_widget = dict()
-        self.related_topics_widget_list = list()
-        self.related_queries_widget_list = list()
+        # requests go to `host` in place of Google, cache keys keep Google's URLs
+        self.host = (host or TRENDS_HOST).rstrip('/')
+        # proxies set in requests_args are used as they are
+        if len(self.proxies) > 0 and "proxies" not in self.requests_args:
+            self.proxy_pool = ProxyPool(self.proxies,
+                                        quarantine_base=proxy_quarantine_base,
+                                        quarantine_max=proxy_quarantine_max)
+        else:
+            self.proxy_pool = None
+        # client side pacing per endpoint and proxy, disabled when rate_limit is falsy
+        if rate_limit:
+            self.rate_limiter = RateLimiter(rate=rate_limit,
+                                            burst=rate_limit_burst,
+                                            min_rate=min(RATE_LIMIT_MIN, rate_limit),
+                                            max_rate=max(RATE_LIMIT_MAX, rate_limit))
+        else:
+            self.rate_limiter = None
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        # NID cookies per proxy, refreshed in the background before they expire
+        self.cookie_cache = CookieCache(ttl=cookie_ttl,
+                                        refresh_ahead=cookie_refresh_ahead)
+        # responses of slowly changing endpoints, TTLs per endpoint URL
+        self.response_cache = ResponseCache(
+            RESPONSE_CACHE_TTLS if cache_ttls is None else cache_ttls,
+            max_entries=cache_size)
+        # durable copy of the slowest changing endpoints, preloaded into memory
+        if disk_cache_path:
+            self.disk_cache = DiskCache(
+                disk_cache_path,
+                DISK_CACHE_TTLS if disk_cache_ttls is None else disk_cache_ttls)
+            self._preload_disk_cache()
+        else:
+            self.disk_cache = None
+        # coalesces identical concurrent requests
+        self._in_flight = SingleFlight()
+        # one keep-alive session per instance, shared by every request
+        self._session = self._create_session()
+        self.cookies = self._load_cookies()
+        # payload of the last `build_payload`, used when a method is not given one
+        self.payload = None
     
-    def GetGoogleCookie(self):
+    def _create_session(self):
         """
-        Gets google cookie (used for each and every proxy; once on init otherwise)
-        Removes proxy from the list on proxy error
+        Create the pooled HTTP session reused by every request of this instance
         """
-        while True:
-            if "proxies" in self.requests_args:
-                try:
-                    return dict(filter(lambda i: i[0] == 'NID', requests.get(
-                        'https://trends.google.com/?geo={geo}'.format(
-                            geo=self.hl[-2:]),
-                        timeout=self.timeout,
-                        **self.requests_args
-                    ).cookies.items()))
-                except:
-                    continue
-            else:
-                if len(self.proxies) > 0:
-                    proxy = {'https': self.proxies[self.proxy_index]}
-                else:
-                    proxy = ''
-                try:
-                    return dict(filter(lambda i: i[0] == 'NID', requests.get(
-                        'https://trends.google.com/?geo={geo}'.format(
-                            geo=self.hl[-2:]),
-                        timeout=self.timeout,
-                        proxies=proxy,
-                        **self.requests_args
-                    ).cookies.items()))
-                except requests.exceptions.ProxyError:
-                    print('Proxy error. Changing IP')
-                    if len(self.proxies) > 1:
-                        self.proxies.remove(self.proxies[self.proxy_index])
-                    else:
-                        print('No more proxies available. Bye!')
-                        raise
-                    continue
-
-    def GetNewProxy(self):
-        """
-        Increment proxy INDEX; zero on overflow
-        """
-        if self.proxy_index < (len(self.proxies) - 1):
-            self.proxy_index += 1
+        session = requests.Session()
+        # Retries mechanism. Activated when one of statements >0 (best used for proxy)
+        if self.retries > 0 or self.backoff_factor > 0:
+            max_retries = Retry(total=self.retries, read=self.retries,
+                                connect=self.retries,
+                                backoff_factor=self.backoff_factor,
+                                status_forcelist=ERROR_CODES,
+                                method_whitelist=frozenset(['GET', 'POST']))
         else:
-            self.proxy_index = 0
+            max_retries = 0
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              max_retries=max_retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'accept-language': self.hl})
+        # cookies are passed explicitly per request, never let the shared
+        # session carry one proxy's cookies over to another
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def close(self):
+        """
+        Release the pooled connections held by the session
+        """
+        self._session.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def _load_cookies(self):
+        """
+        Fetch the cookie of a direct connection on init, proxies get theirs on first use
+        """
+        if self.proxy_pool is not None:
+            return None
+        return self._cookies(self._acquire_proxy())
+
+    def _acquire_proxy(self):
+        """
+        Lease the proxy for the next request, `None` for a direct connection
+        """
+        if self.proxy_pool is not None:
+            return self.proxy_pool.acquire()
+        if "proxies" in self.requests_args:
+            return self.requests_args['proxies'].get('https')
+        return None
+
+    def _release_proxy(self, proxy, latency=None, status=None, error=False):
+        if self.proxy_pool is not None:
+            self.proxy_pool.release(proxy, latency=latency, status=status,
+                                    error=error)
+
+    def _endpoint(self, url):
+        """
+        Return the endpoint constant `url` belongs to
+        """
+        matches = [endpoint for endpoint in ENDPOINT_URLS if url.startswith(endpoint)]
+        if matches:
+            return max(matches, key=len)
+        return url.split('?')[0]
+
+    def _rate_limit_delay(self, endpoint, proxy):
+        """
+        Reserve a request slot and return the seconds to wait for it
+        """
+        if self.rate_limiter is None:
+            return 0
+        return self.rate_limiter.reserve((endpoint, proxy))
+
+    def _rate_limit_feedback(self, endpoint, proxy, response):
+        if self.rate_limiter is None:
+            return
+        # Google answers 429 or a quota message once we go too fast
+        rate_limited = response.status_code == 429 or (
+            response.status_code != 200 and self.google_rl in response.text)
+        self.rate_limiter.feedback((endpoint, proxy), rate_limited)
+
+    @staticmethod
+    def _request_key(url, method, trim_chars, kwargs):
+        """
+        Identify a request by its URL and normalized parameters
+        """
+        return (method, url, trim_chars,
+                json.dumps(kwargs, sort_keys=True, default=str))
+
+    def _memory_cache_ttl(self, endpoint, cache_ttl=None):
+        return self.response_cache.ttl(endpoint) if cache_ttl is None else cache_ttl
+
+    def _disk_cache_ttl(self, endpoint, cache_ttl=None):
+        if self.disk_cache is None or not self.disk_cache.ttl(endpoint):
+            return 0
+        return self.disk_cache.ttl(endpoint) if cache_ttl is None else cache_ttl
+
+    def _cached_response(self, endpoint, key, cache_ttl=None):
+        """
+        Return `(hit, req_json)` from the response cache, falling back to the disk cache
+        """
+        memory_ttl = self._memory_cache_ttl(endpoint, cache_ttl)
+        if memory_ttl:
+            hit, req_json = self.response_cache.get(endpoint, key)
+            if hit:
+                return True, req_json
+        if self._disk_cache_ttl(endpoint, cache_ttl):
+            hit, req_json, remaining = self.disk_cache.get(key)
+            if hit:
+                if memory_ttl:
+                    self.response_cache.put(endpoint, key, req_json,
+                                            min(memory_ttl, remaining))
+                return True, req_json
+        return False, None
+
+    def _cache_response(self, endpoint, key, req_json, cache_ttl=None):
+        memory_ttl = self._memory_cache_ttl(endpoint, cache_ttl)
+        if memory_ttl:
+            self.response_cache.put(endpoint, key, req_json, memory_ttl)
+        disk_ttl = self._disk_cache_ttl(endpoint, cache_ttl)
+        if disk_ttl:
+            self.disk_cache.put(endpoint, key, req_json, disk_ttl)
+
+    def _preload_disk_cache(self):
+        """
+        Load every live response of the disk cache into the response cache
+        """
+        for endpoint, key, req_json, remaining in self.disk_cache.load():
+            memory_ttl = self.response_cache.ttl(endpoint)
+            if memory_ttl:
+                self.response_cache.put(endpoint, key, req_json,
+                                        min(memory_ttl, remaining))
+
+    def _cookie_key(self, proxy):
+        return (proxy, self.hl, self.hl[-2:])
+
+    def _cookies(self, proxy):
+        """
+        Return the NID cookie of `proxy` from the cache, fetching it on a miss
+        and refreshing it in the background when it is about to expire
+        """
+        key = self._cookie_key(proxy)
+        cookies, refresh = self.cookie_cache.lookup(key)
+        if cookies is None:
+            # concurrent requests missing the same cookie share one fetch
+            return self._in_flight.do(('cookie',) + key, self.GetGoogleCookie, proxy)
+        if refresh:
+            self._schedule_cookie_refresh(proxy)
+        return cookies
+
+    def _schedule_cookie_refresh(self, proxy):
+        threading.Thread(target=self._refresh_cookie, args=(proxy,),
+                         daemon=True).start()
+
+    def _refresh_cookie(self, proxy):
+        try:
+            self.GetGoogleCookie(proxy)
+        except Exception:
+            self.cookie_cache.release(self._cookie_key(proxy))
+
+    def GetGoogleCookie(self, proxy=None):
+        """
+        Gets google cookie through `proxy` and stores it in the cookie cache
+        """
+        kwargs = dict(self.requests_args)
+        if 'proxies' not in kwargs:
+            kwargs['proxies'] = {'https': proxy} if proxy else ''
+        response = self._session.get(
+            self._url(GOOGLE_COOKIE_URL.format(geo=self.hl[-2:])),
+            timeout=self.timeout,
+            **kwargs
+        )
+        cookies = dict(filter(lambda i: i[0] == 'NID', response.cookies.items()))
+        self.cookie_cache.put(self._cookie_key(proxy), cookies)
+        return cookies
 
     def _get_data(self,
                 url,
                 method=GET_METHOD,
                 trim_chars=0,
+                bypass_cache=False,
+                cache_ttl=None,
                 **kwargs):
         """Send a request to Google and return the JSON response as a Python object
         :param url: the url to which the request will be sent
         :param method: the HTTP method ('get' or 'post')
         :param trim_chars: how many characters should be trimmed off the beginning of the content of the response
             before this is passed to the JSON parser
+        :param bypass_cache: skip the response cache lookup, the fresh response is still cached
+        :param cache_ttl: seconds to cache the response for, defaults to the endpoint's TTL
         :param kwargs: any extra key arguments passed to the request builder (usually query parameters or data)
         :return:
         """
-        s = requests.session()
-        # Retries mechanism. Activated when one of statements >0 (best used for proxy)
-        if self.retries > 0 or self.backoff_factor > 0:
-            retry = Retry(total=self.retries, read=self.retries,
-                          connect=self.retries,
-                          backoff_factor=self.backoff_factor,
-                          status_forcelist=ERROR_CODES,
-                          method_whitelist=frozenset(['GET', 'POST']))
-            s.mount('https://', HTTPAdapter(max_retries=retry))
-
-        s.headers.update({'accept-language': self.hl})
-        if len(self.proxies) > 0:
-            self.cookies = self.GetGoogleCookie()
-            s.proxies.update({'https': self.proxies[self.proxy_index]})
+        endpoint = self._endpoint(url)
+        key = self._request_key(url, method, trim_chars, kwargs)
+        if not bypass_cache:
+            hit, req_json = self._cached_response(endpoint, key, cache_ttl)
+            if hit:
+                return req_json
+        # identical requests in flight at the same time share one upstream call
+        req_json = self._in_flight.do(key, self._fetch_data, url, method,
+                                      trim_chars, **kwargs)
+        self._cache_response(endpoint, key, req_json, cache_ttl)
+        return req_json
+
+    def _fetch_data(self, url, method, trim_chars, **kwargs):
+        """Send the request of `_get_data`, failing over between proxies"""
+        # a proxy that cannot be reached is quarantined and the next one is tried
+        attempts = len(self.proxy_pool) if self.proxy_pool is not None else 1
+        endpoint = self._endpoint(url)
+        for attempt in range(attempts):
+            proxy = self._acquire_proxy()
+            delay = self._rate_limit_delay(endpoint, proxy)
+            if delay > 0:
+                time.sleep(delay)
+            start = time.monotonic()
+            response = None
+            error = False
+            try:
+                response = self._request(url, method, proxy, **kwargs)
+                if response.status_code in COOKIE_REJECTED_CODES:
+                    # Google rejected the cookie: drop it and try once more with a new one
+                    self.cookie_cache.invalidate(self._cookie_key(proxy))
+                    response = self._request(url, method, proxy, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                error = True
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except Exception:
+                error = True
+                raise
+            finally:
+                # the lease ends whatever happens, a cancelled request is not held against the proxy
+                if response is None:
+                    self._release_proxy(proxy, error=error)
+                else:
+                    self._release_proxy(proxy, latency=time.monotonic() - start,
+                                        status=response.status_code, error=error)
+            self._rate_limit_feedback(endpoint, proxy, response)
+            return self._response_json(response, trim_chars)
+
+    def _url(self, url):
+        """Return `url` on the configured host"""
+        if self.host != TRENDS_HOST and url.startswith(TRENDS_HOST):
+            return self.host + url[len(TRENDS_HOST):]
+        return url
+
+    def _request(self, url, method, proxy, **kwargs):
+        """Send a single request through `proxy` with its cached cookie"""
+        s = self._session
+        url = self._url(url)
+        cookies = self._cookies(proxy)
+        if proxy and 'proxies' not in self.requests_args:
+            kwargs['proxies'] = {'https': proxy}
         if method == POST_METHOD:
             response = s.post(url, timeout=self.timeout,
-                              cookies=self.cookies, **kwargs,
+                              cookies=cookies, **kwargs,
                               **self.requests_args)  # DO NOT USE retries or backoff_factor here
         else:
-            response = s.get(url, timeout=self.timeout, cookies=self.cookies,
+            response = s.get(url, timeout=self.timeout, cookies=cookies,
                              **kwargs, **self.requests_args)  # DO NOT USE retries or backoff_factor here
+        return response
+
+    def _response_json(self, response, trim_chars=0):
+        """Check a response from Google and return its JSON content as a Python object
+        :param response: a `requests` or `httpx` response
+        :param trim_chars: how many characters should be trimmed off the beginning of the content
+        :return:
+        """
         # check if the response contains json and throw an exception otherwise
         # Google mostly sends 'application/json' in the Content-Type header,
         # but occasionally it sends 'application/javascript
@@ -159,11 +427,9 @@ class TrendReq(object):
                 'text/javascript' in response.headers['Content-Type']:
             # trim initial characters
             # some responses start with garbage characters, like ")]}',"
-            # these have to be cleaned before being passed to the json parser
-            content = response.text[trim_chars:]
-            # parse json
-            self.GetNewProxy()
-            return json.loads(content)
+            # these are skipped by offset on the raw bytes, without copying the body
+            return loads_trimmed(response.content, trim_chars,
+                                 charset(response.headers['Content-Type']))
         else:
             # error
             raise exceptions.ResponseError(
@@ -177,264 +443,461 @@ class TrendReq(object):
                     timeframe='today 5-y',
                     geo='',
                     gprop=''):
-        """Create the payload for related queries, interest over time and interest by region"""
+        """Create the payload for related queries, interest over time and interest by region
+
+        The `TrendPayload` returned carries its own widget tokens. It is also
+        kept as the instance's payload, used by the methods not given one;
+        pass it explicitly when the instance serves concurrent queries.
+        The tokens of a query are cached for a while, see `_with_tokens`.
+        """
+        return self._use_payload(self._explore(kw_list, cat, timeframe, geo, gprop))
+
+    def _explore(self, kw_list, cat, timeframe, geo, gprop):
+        """Request the widget tokens of a query and return its payload"""
+        token_payload = self._token_payload(kw_list, cat, timeframe, geo, gprop)
+        # get tokens, remembering whether they were cached to renew only those
+        cached, req_json = self._cached_response(self._endpoint(GENERAL_URL),
+                                                 self._explore_key(token_payload))
+        if not cached:
+            req_json = self._get_data(
+                url=GENERAL_URL,
+                method=GET_METHOD,
+                bypass_cache=True,
+                params=token_payload,
+                trim_chars=4,
+            )
+        return TrendPayload.from_widgets(kw_list, cat, timeframe, geo or self.geo,
+                                         gprop, token_payload, req_json['widgets'], cached)
+
+    def _explore_key(self, token_payload):
+        """Return the response cache key of the request for the tokens of `token_payload`"""
+        return self._request_key(GENERAL_URL, GET_METHOD, 4, {'params': token_payload})
+
+    def _with_tokens(self, payload, fetch):
+        """
+        Return `fetch(payload)`, renewing the payload's cached tokens once if Google rejects them
+
+        Tokens come from the response cache when the same query was explored
+        recently and may have expired there. A rejected cached token is
+        dropped from the cache and the query is explored again, the
+        instance's payload is replaced by the new one. Tokens just received
+        from Google are not renewed, their rejection is raised as is.
+        """
+        try:
+            return fetch(payload)
+        except exceptions.ResponseError as e:
+            if (not payload.cached or e.response is None
+                    or e.response.status_code not in WIDGET_TOKEN_REJECTED_CODES):
+                raise
+        return fetch(self._renew_payload(payload))
+
+    def _renew_payload(self, payload):
+        """Drop the cached tokens of `payload` and return the payload explored again"""
+        self.response_cache.invalidate(self._explore_key(payload.token_payload))
+        renewed = self._explore(payload.kw_list, payload.cat, payload.timeframe,
+                                payload.geo, payload.gprop)
+        if payload is self.payload:
+            self._use_payload(renewed)
+        return renewed
+
+    def _use_payload(self, payload):
+        """Make `payload` the instance's payload and return it"""
+        self.payload = payload
+        self.kw_list = list(payload.kw_list)
+        return payload
+
+    def _payload(self, payload):
+        """Return `payload`, the instance's payload when not given"""
+        payload = payload or self.payload
+        if payload is None:
+            raise ValueError('No payload, call build_payload first')
+        return payload
+
+    # widgets of the instance's payload, read-only
+    @property
+    def token_payload(self):
+        return self.payload.token_payload if self.payload else dict()
+
+    @property
+    def interest_over_time_widget(self):
+        return self.payload.interest_over_time_widget if self.payload else dict()
+
+    @property
+    def interest_by_region_widget(self):
+        return self.payload.interest_by_region_widget if self.payload else dict()
+
+    @property
+    def related_topics_widget_list(self):
+        return list(self.payload.related_topics_widgets) if self.payload else list()
+
+    @property
+    def related_queries_widget_list(self):
+        return list(self.payload.related_queries_widgets) if self.payload else list()
+
+    def _token_payload(self, kw_list, cat, timeframe, geo, gprop):
+        """Return the explore payload used to request the widget tokens"""
         if gprop not in ['', 'images', 'news', 'youtube', 'froogle']:
             raise ValueError('gprop must be empty (to indicate web), images, news, youtube, or froogle')
-        self.kw_list = kw_list
-        self.geo = geo or self.geo
-        self.token_payload = {
+        if len(kw_list) > MAX_KEYWORDS:
+            raise ValueError('Google compares at most {} keywords, use bulk_interest_over_time '
+                             'for more'.format(MAX_KEYWORDS))
+        geo = geo or self.geo
+        token_payload = {
             'hl': self.hl,
             'tz': self.tz,
             'req': {'comparisonItem': [], 'category': cat, 'property': gprop}
         }
 
         # build out json for each keyword
-        for kw in self.kw_list:
+        for kw in kw_list:
             keyword_payload = {'keyword': kw, 'time': timeframe,
-                               'geo': self.geo}
-            self.token_payload['req']['comparisonItem'].append(keyword_payload)
+                               'geo': geo}
+            token_payload['req']['comparisonItem'].append(keyword_payload)
         # requests will mangle this if it is not a string
-        self.token_payload['req'] = json.dumps(self.token_payload['req'])
-        # get tokens
-        self._tokens()
-    
-    def _tokens(self):
-        """Makes request to Google to get API tokens for interest over time, interest by region and related queries"""
-        # make the request and parse the returned json
-        widget_dicts = self._get_data(
-            url=GENERAL_URL,
-            method=GET_METHOD,
-            params=self.token_payload,
-            trim_chars=4,
-        )['widgets']
-        # order of the json matters...
-        first_region_token = True
-        # clear self.related_queries_widget_list and self.related_topics_widget_list
-        # of old keywords'widgets
-        self.related_queries_widget_list[:] = []
-        self.related_topics_widget_list[:] = []
-        # assign requests
-        for widget in widget_dicts:
-            if widget['id'] == 'TIMESERIES':
-                self.interest_over_time_widget = widget
-            if widget['id'] == 'GEO_MAP' and first_region_token:
-                self.interest_by_region_widget = widget
-                first_region_token = False
-            # response for each term, put into a list
-            if 'RELATED_TOPICS' in widget['id']:
-                self.related_topics_widget_list.append(widget)
-            if 'RELATED_QUERIES' in widget['id']:
-                self.related_queries_widget_list.append(widget)
-        return
-    
-    def interest_over_time(self):
-        """Request data from Google's Interest Over Time section and return a dataframe"""
+        token_payload['req'] = json.dumps(token_payload['req'])
+        return token_payload
 
-        over_time_payload = {
-            # convert to string as requests will mangle
-            'req': json.dumps(self.interest_over_time_widget['request']),
-            'token': self.interest_over_time_widget['token'],
-            'tz': self.tz
-        }
+    def interest_over_time(self, compact=False, raw=False, payload=None):
+        """Request data from Google's Interest Over Time section and return a dataframe
 
+        With `compact` an `InterestSeries` is returned instead, about 5 times smaller
+        With `raw` a dict of NumPy arrays by column is returned, pandas is not imported
+        """
+        payload = self._payload(payload)
         # make the request and parse the returned json
-        req_json = self._get_data(
+        req_json = self._with_tokens(payload, self._interest_over_time_json)
+        if compact:
+            from service.interest_store import InterestSeries
+
+            return InterestSeries.from_timeline(req_json['default']['timelineData'], payload.kw_list)
+        return self._parse_interest_over_time(req_json, payload.kw_list, raw)
+
+    def _interest_over_time_json(self, payload):
+        return self._get_data(
             url=INTEREST_OVER_TIME_URL,
             method=GET_METHOD,
             trim_chars=5,
-            params=over_time_payload,
+            params=self._interest_over_time_payload(payload.interest_over_time_widget),
         )
 
-        df = pd.DataFrame(req_json['default']['timelineData'])
-        if (df.empty):
-            return df
-
-        df['date'] = pd.to_datetime(df['time'].astype(dtype='float64'),
-                                    unit='s')
-        df = df.set_index(['date']).sort_index()
-        # split list columns into seperate ones, remove brackets and split on comma
-        result_df = df['value'].apply(lambda x: pd.Series(
-            str(x).replace('[', '').replace(']', '').split(',')))
-        # rename each column with its search term, relying on order that google provides...
-        for idx, kw in enumerate(self.kw_list):
-            # there is currently a bug with assigning columns that may be
-            # parsed as a date in pandas: use explicit insert column method
-            result_df.insert(len(result_df.columns), kw,
-                             result_df[idx].astype('int'))
-            del result_df[idx]
-
-        if 'isPartial' in df:
-            # make other dataframe from isPartial key data
-            # split list columns into seperate ones, remove brackets and split on comma
-            df = df.fillna(False)
-            result_df2 = df['isPartial'].apply(lambda x: pd.Series(
-                str(x).replace('[', '').replace(']', '').split(',')))
-            result_df2.columns = ['isPartial']
-            # Change to a bool type.
-            result_df2.isPartial = result_df2.isPartial == 'True'
-            # concatenate the two dataframes
-            final = pd.concat([result_df, result_df2], axis=1)
-        else:
-            final = result_df
-            final['isPartial'] = False
+    def _interest_over_time_payload(self, widget):
+        return {
+            # convert to string as requests will mangle
+            'req': json.dumps(widget['request']),
+            'token': widget['token'],
+            'tz': self.tz
+        }
+
+    def _parse_interest_over_time(self, req_json, kw_list=None, raw=False):
+        from service.interest_store import timeline_arrays
+
+        kw_list = self.kw_list if kw_list is None else kw_list
+        timeline = req_json['default']['timelineData']
+        # one pass over the points, the values of every keyword form a single matrix
+        times, values, partial = timeline_arrays(timeline, len(kw_list))
+        if raw:
+            records = {'date': times.astype('datetime64[s]')}
+            records.update((kw, values[:, idx]) for idx, kw in enumerate(kw_list))
+            records['isPartial'] = partial
+            return records
+
+        import pandas as pd
+
+        if not timeline:
+            return pd.DataFrame(timeline)
+        index = pd.DatetimeIndex(pd.to_datetime(times, unit='s'), name='date')
+        # columns given up front, keywords that look like dates are not parsed
+        final = pd.DataFrame(values, index=index, columns=list(kw_list))
+        final['isPartial'] = partial
+        return final
 
+    def interest_over_time_of(self,
+                            kw_list,
+                            cat=0,
+                            timeframe='today 5-y',
+                            geo='',
+                            gprop='',
+                            raw=False):
+        """Request the interest over time of `kw_list` and return a dataframe
+
+        Unlike `build_payload` + `interest_over_time` the instance's payload and
+        widgets are left untouched, so calls may run concurrently
+        """
+        req_json = self._window_timeline(kw_list, cat, timeframe, geo, gprop)
+        return self._parse_interest_over_time(req_json, kw_list, raw)
+
+    def bulk_interest_over_time(self,
+                                keywords,
+                                anchor=None,
+                                cat=0,
+                                timeframe='today 5-y',
+                                geo='',
+                                gprop='',
+                                max_workers=BULK_MAX_WORKERS,
+                                raw=False):
+        """Request the interest over time of any number of keywords on one scale and return a dataframe
+
+        Keywords are compared 4 at a time together with `anchor`, the first
+        keyword by default. Groups are requested concurrently, up to
+        `max_workers` at a time, and rescaled so the anchor matches across
+        groups, the largest value of all becoming 100. Pick an anchor of middling
+        popularity: Google rounds values to integers, an anchor close to 0 in a
+        group gives a coarse scale. Groups in which the anchor has no interest
+        cannot be rescaled and are NaN, a ValueError is raised when that is
+        every group. A single group is returned as Google scaled it. With
+        `raw` a dict of NumPy arrays by column is returned.
+        """
+        groups = self._keyword_groups(keywords, anchor)
+
+        def fetch(group):
+            return self._window_timeline(group, cat, timeframe, geo, gprop)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(fetch, groups))
+        return self._parse_bulk_interest_over_time(groups, responses, raw)
+
+    @staticmethod
+    def _keyword_groups(keywords, anchor=None):
+        """Split `keywords` into payloads of the anchor followed by up to 4 other keywords"""
+        keywords = list(dict.fromkeys(keywords))
+        if not keywords:
+            raise ValueError('At least one keyword is required')
+        anchor = keywords[0] if anchor is None else anchor
+        others = [kw for kw in keywords if kw != anchor]
+        size = MAX_KEYWORDS - 1
+        return [[anchor] + others[i:i + size] for i in range(0, len(others), size)] or [[anchor]]
+
+    @staticmethod
+    def _rescale_groups(groups, responses):
+        """
+        Return the times, partial flags, keywords and `(points, keywords)` matrix
+        of the groups' timelines put on one scale through their anchor
+        """
+        import numpy as np
+        from service.interest_store import timeline_arrays
+
+        parsed = [timeline_arrays(response['default']['timelineData'], len(group))
+                  for group, response in zip(groups, responses)]
+        times, _, partial = max(parsed, key=lambda arrays: len(arrays[0]))
+        # groups x points x keywords, a group without the reference timeline stays NaN
+        stacked = np.full((len(groups), len(times), MAX_KEYWORDS), np.nan)
+        for idx, (group_times, values, _) in enumerate(parsed):
+            if np.array_equal(group_times, times):
+                stacked[idx, :, :values.shape[1]] = values
+
+        # the first group where the anchor has interest is the reference scale
+        totals = np.nansum(stacked[:, :, 0], axis=1)
+        if len(groups) == 1:
+            # a single group is on one scale already
+            reference, factors = 0, np.ones(1)
+        elif not (totals > 0).any():
+            raise ValueError('{!r} has no interest in any group, pass an anchor with '
+                             'interest over the timeframe'.format(groups[0][0]))
+        else:
+            reference = int(np.argmax(totals > 0))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                factors = np.where(totals > 0, totals[reference] / totals, np.nan)
+        scaled = stacked * factors[:, None, None]
+        peak = np.nanmax(scaled) if np.isfinite(scaled).any() else 0
+        if peak > 0:
+            scaled *= 100 / peak
+
+        columns = [groups[0][0]] + [kw for group in groups for kw in group[1:]]
+        matrix = np.column_stack([scaled[reference, :, :1]] +
+                                 [scaled[idx, :, 1:len(group)] for idx, group in enumerate(groups)])
+        return times, partial, columns, matrix
+
+    def _parse_bulk_interest_over_time(self, groups, responses, raw=False):
+        times, partial, columns, matrix = self._rescale_groups(groups, responses)
+        if raw:
+            records = {'date': times.astype('datetime64[s]')}
+            records.update((kw, matrix[:, idx]) for idx, kw in enumerate(columns))
+            records['isPartial'] = partial
+            return records
+
+        import pandas as pd
+
+        index = pd.DatetimeIndex(pd.to_datetime(times, unit='s'), name='date')
+        final = pd.DataFrame(matrix, index=index, columns=columns)
+        final['isPartial'] = partial
         return final
 
     def interest_by_region(self,
                         resolution='COUNTRY',
                         inc_low_vol=False,
-                        inc_geo_code=False):
-        """Request data from Google's Interest by Region section and return a dataframe"""
+                        inc_geo_code=False,
+                        dtype='int64',
+                        raw=False,
+                        payload=None):
+        """Request data from Google's Interest by Region section and return a dataframe
+
+        Values range from 0 to 100, `dtype='uint8'` stores them in an eighth of the memory
+        With `raw` a dict of NumPy arrays by column is returned, pandas is not imported
+        """
+        payload = self._payload(payload)
 
-        # make the request
-        region_payload = dict()
-        if self.geo == '':
-            self.interest_by_region_widget['request'][
-                'resolution'] = resolution
-        elif self.geo == 'US' and resolution in ['DMA', 'CITY', 'REGION']:
-            self.interest_by_region_widget['request'][
-                'resolution'] = resolution
+        def fetch(payload):
+            return self._get_data(
+                url=INTEREST_BY_REGION_URL,
+                method=GET_METHOD,
+                trim_chars=5,
+                params=self._interest_by_region_payload(payload, resolution, inc_low_vol),
+            )
 
-        self.interest_by_region_widget['request'][
-            'includeLowSearchVolumeGeos'] = inc_low_vol
+        # parse returned json
+        req_json = self._with_tokens(payload, fetch)
+        return self._parse_interest_by_region(req_json, inc_geo_code, dtype, raw, payload.kw_list)
+
+    def _interest_by_region_payload(self, payload, resolution, inc_low_vol):
+        # a copy, the widget is shared by every user of the payload
+        request = dict(payload.interest_by_region_widget['request'])
+        if payload.geo == '':
+            request['resolution'] = resolution
+        elif payload.geo == 'US' and resolution in ['DMA', 'CITY', 'REGION']:
+            request['resolution'] = resolution
+        request['includeLowSearchVolumeGeos'] = inc_low_vol
+
+        return {
+            # convert to string as requests will mangle
+            'req': json.dumps(request),
+            'token': payload.interest_by_region_widget['token'],
+            'tz': self.tz
+        }
 
-        # convert to string as requests will mangle
-        region_payload['req'] = json.dumps(
-            self.interest_by_region_widget['request'])
-        region_payload['token'] = self.interest_by_region_widget['token']
-        region_payload['tz'] = self.tz
+    def _parse_interest_by_region(self, req_json, inc_geo_code, dtype='int64', raw=False, kw_list=None):
+        import numpy as np
 
-        # parse returned json
-        req_json = self._get_data(
-            url=INTEREST_BY_REGION_URL,
-            method=GET_METHOD,
-            trim_chars=5,
-            params=region_payload,
-        )
-        df = pd.DataFrame(req_json['default']['geoMapData'])
-        if (df.empty):
-            return df
-
-        # rename the column with the search keyword
-        df = df[['geoName', 'geoCode', 'value']].set_index(
-            ['geoName']).sort_index()
-        # split list columns into separate ones, remove brackets and split on comma
-        result_df = df['value'].apply(lambda x: pd.Series(
-            str(x).replace('[', '').replace(']', '').split(',')))
+        kw_list = self.kw_list if kw_list is None else kw_list
+        geo_map = req_json['default']['geoMapData']
+        # one pass over the regions, the values of every keyword form a single matrix
+        n_kw = len(kw_list)
+        names = np.array([region['geoName'] for region in geo_map], dtype=object)
+        values = np.array([region['value'][:n_kw] for region in geo_map], dtype=dtype)
+
+        order = np.argsort(names, kind='stable')
+        records = {'geoName': names[order]}
         if inc_geo_code:
-            result_df['geoCode'] = df['geoCode']
+            records['geoCode'] = np.array([geo_map[i]['geoCode'] for i in order], dtype=object)
+        values = values[order].reshape(len(geo_map), n_kw)
+        records.update((kw, values[:, idx]) for idx, kw in enumerate(kw_list))
+        if raw:
+            return records
 
-        # rename each column with its search term
-        for idx, kw in enumerate(self.kw_list):
-            result_df[kw] = result_df[idx].astype('int')
-            del result_df[idx]
+        import pandas as pd
 
-        return result_df
+        if not geo_map:
+            return pd.DataFrame(geo_map)
+        return pd.DataFrame(records).set_index('geoName')
 
-    def related_topics(self):
+    def related_topics(self, max_workers=RELATED_MAX_WORKERS, raw=False, payload=None):
         """Request data from Google's Related Topics section and return a dictionary of dataframes
 
         If no top and/or rising related topics are found, the value for the key "top" and/or "rising" will be None
+        The widget of each keyword is requested concurrently, up to `max_workers` at a time.
+        With `raw` the values are lists of Google's records instead of dataframes.
         """
 
-        # make the request
-        related_payload = dict()
+        payload = self._payload(payload)
+        # make the requests and parse the returned json
         result_dict = dict()
-        for request_json in self.related_topics_widget_list:
-            # ensure we know which keyword we are looking at rather than relying on order
-            try:
-                kw = request_json['request']['restriction'][
-                    'complexKeywordsRestriction']['keyword'][0]['value']
-            except KeyError:
-                kw = ''
-            # convert to string as requests will mangle
-            related_payload['req'] = json.dumps(request_json['request'])
-            related_payload['token'] = request_json['token']
-            related_payload['tz'] = self.tz
+        related_json = self._with_tokens(
+            payload, lambda payload: self._related_json(payload.related_topics_widgets, max_workers))
+        for kw, req_json in related_json:
+            result_dict[kw] = self._parse_related_topics(req_json, raw)
+        return result_dict
 
-            # parse the returned json
-            req_json = self._get_data(
+    def _related_json(self, widget_list, max_workers):
+        """Request related widgets concurrently, return `(keyword, response)` pairs in widget order"""
+        def fetch(request_json):
+            kw, related_payload = self._related_payload(request_json)
+            return kw, self._get_data(
                 url=RELATED_QUERIES_URL,
                 method=GET_METHOD,
                 trim_chars=5,
                 params=related_payload,
             )
 
-            # top topics
-            try:
-                top_list = req_json['default']['rankedList'][0][
-                    'rankedKeyword']
-                df_top = pd.DataFrame(
-                    [nested_to_record(d, sep='_') for d in top_list])
-            except KeyError:
-                # in case no top topics are found, the lines above will throw a KeyError
-                df_top = None
+        if max_workers <= 1 or len(widget_list) <= 1:
+            return [fetch(request_json) for request_json in widget_list]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch, list(widget_list)))
 
-            # rising topics
+    def _related_payload(self, request_json):
+        """Return the keyword a related widget belongs to and the payload to request it"""
+        # ensure we know which keyword we are looking at rather than relying on order
+        try:
+            kw = request_json['request']['restriction'][
+                'complexKeywordsRestriction']['keyword'][0]['value']
+        except KeyError:
+            kw = ''
+        related_payload = dict()
+        # convert to string as requests will mangle
+        related_payload['req'] = json.dumps(request_json['request'])
+        related_payload['token'] = request_json['token']
+        related_payload['tz'] = self.tz
+        return kw, related_payload
+
+    @staticmethod
+    def _related_records(req_json):
+        """Return the top and rising ranked lists of a related widget, None when missing"""
+        ranked = dict()
+        for idx, key in enumerate(('top', 'rising')):
             try:
-                rising_list = req_json['default']['rankedList'][1][
-                    'rankedKeyword']
-                df_rising = pd.DataFrame(
-                    [nested_to_record(d, sep='_') for d in rising_list])
+                ranked[key] = req_json['default']['rankedList'][idx]['rankedKeyword']
             except KeyError:
-                # in case no rising topics are found, the lines above will throw a KeyError
-                df_rising = None
+                # in case no top or rising entries are found
+                ranked[key] = None
+        return ranked
 
-            result_dict[kw] = {'rising': df_rising, 'top': df_top}
-        return result_dict
+    def _parse_related_topics(self, req_json, raw=False):
+        ranked = self._related_records(req_json)
+        if raw:
+            return {'rising': ranked['rising'], 'top': ranked['top']}
+
+        import pandas as pd
+        from pandas.io.json._normalize import nested_to_record
+
+        df_top, df_rising = [
+            None if records is None else pd.DataFrame(
+                [nested_to_record(d, sep='_') for d in records])
+            for records in (ranked['top'], ranked['rising'])]
+        return {'rising': df_rising, 'top': df_top}
 
-    def related_queries(self):
+    def related_queries(self, max_workers=RELATED_MAX_WORKERS, raw=False, payload=None):
         """Request data from Google's Related Queries section and return a dictionary of dataframes
 
         If no top and/or rising related queries are found, the value for the key "top" and/or "rising" will be None
+        The widget of each keyword is requested concurrently, up to `max_workers` at a time.
+        With `raw` the values are lists of Google's records instead of dataframes.
         """
 
-        # make the request
-        related_payload = dict()
+        payload = self._payload(payload)
+        # make the requests and parse the returned json
         result_dict = dict()
-        for request_json in self.related_queries_widget_list:
-            # ensure we know which keyword we are looking at rather than relying on order
-            try:
-                kw = request_json['request']['restriction'][
-                    'complexKeywordsRestriction']['keyword'][0]['value']
-            except KeyError:
-                kw = ''
-            # convert to string as requests will mangle
-            related_payload['req'] = json.dumps(request_json['request'])
-            related_payload['token'] = request_json['token']
-            related_payload['tz'] = self.tz
+        related_json = self._with_tokens(
+            payload, lambda payload: self._related_json(payload.related_queries_widgets, max_workers))
+        for kw, req_json in related_json:
+            result_dict[kw] = self._parse_related_queries(req_json, raw)
+        return result_dict
 
-            # parse the returned json
-            req_json = self._get_data(
-                url=RELATED_QUERIES_URL,
-                method=GET_METHOD,
-                trim_chars=5,
-                params=related_payload,
-            )
+    def _parse_related_queries(self, req_json, raw=False):
+        ranked = self._related_records(req_json)
+        if raw:
+            return ranked
 
-            # top queries
-            try:
-                top_df = pd.DataFrame(
-                    req_json['default']['rankedList'][0]['rankedKeyword'])
-                top_df = top_df[['query', 'value']]
-            except KeyError:
-                # in case no top queries are found, the lines above will throw a KeyError
-                top_df = None
+        import pandas as pd
 
-            # rising queries
+        result = dict()
+        for key, records in ranked.items():
             try:
-                rising_df = pd.DataFrame(
-                    req_json['default']['rankedList'][1]['rankedKeyword'])
-                rising_df = rising_df[['query', 'value']]
+                result[key] = pd.DataFrame(records)[['query', 'value']]
             except KeyError:
-                # in case no rising queries are found, the lines above will throw a KeyError
-                rising_df = None
-
-            result_dict[kw] = {'top': top_df, 'rising': rising_df}
-        return result_dict
+                # in case no queries are found there is no such column
+                result[key] = None
+        return result
 
-    def trending_searches(self, pn='united_states'):
-        """Request data from Google's Hot Searches section and return a dataframe"""
+    def trending_searches(self, pn='united_states', bypass_cache=False, raw=False):
+        """Request data from Google's Hot Searches section and return a dataframe, the JSON with `raw`"""
 
         # make the request
         # forms become obsolete due to the new TRENDING_SEARCHES_URL
@@ -442,36 +905,110 @@ class TrendReq(object):
         req_json = self._get_data(
             url=TRENDING_SEARCHES_URL,
             method=GET_METHOD,
+            bypass_cache=bypass_cache,
             **self.requests_args
         )
-        result_df = pd.DataFrame(req_json)
-        return result_df
+        return self._parse_trending_searches(req_json, raw)
+
+    def _parse_trending_searches(self, req_json, raw=False):
+        if raw:
+            return req_json
+
+        import pandas as pd
+
+        return pd.DataFrame(req_json)
 
     def today_searches(self,
-                    pn='VN'):
-        """Request data from Google Daily Trends section and returns a dataframe"""
-        forms = {'ns': 15, 'geo': pn, 'tz': '-180', 'hl': self.hl}
-        req_json = self._get_data(
+                    pn='VN',
+                    bypass_cache=False,
+                    raw=False):
+        """Request data from Google Daily Trends section and returns a dataframe, a list with `raw`"""
+        return self._parse_today_searches(self._today_searches_json(pn, bypass_cache), raw)
+
+    def daily_trends(self,
+                    pn='VN',
+                    bypass_cache=False,
+                    as_dataframe=False):
+        """Request every day of Google Daily Trends and return a generator of one record per trend
+
+        Records carry the day, query, traffic, related queries, articles and
+        image of a trend. They share the cached response and must not be
+        mutated. With `as_dataframe` the records are built into one dataframe.
+        `today_searches` reads the same response, calling both requests it once.
+        """
+        records = self._daily_trends_records(self._today_searches_json(pn, bypass_cache))
+        if as_dataframe:
+            return self._daily_trends_frame(records)
+        return records
+
+    def _today_searches_json(self, pn, bypass_cache):
+        return self._get_data(
             url=TODAY_SEARCHES_URL,
             method=GET_METHOD,
             trim_chars=5,
-            params=forms,
+            params=self._today_searches_payload(pn),
+            bypass_cache=bypass_cache,
             **self.requests_args
         )
-        req_json = req_json['default']['trendingSearchesDays'][0]['trendingSearches']
-        result_df = pd.DataFrame()
-        # parse the returned json
-        sub_df = pd.DataFrame()
-        for trend in req_json:
-            sub_df = sub_df.append(trend['title'], ignore_index=True)
-        result_df = pd.concat([result_df, sub_df])
-        return result_df.iloc[:, -1]
+
+    def _today_searches_payload(self, pn):
+        return {'ns': 15, 'geo': pn, 'tz': '-180', 'hl': self.hl}
+
+    def _parse_today_searches(self, req_json, raw=False):
+        """Return the queries trending on the latest day"""
+        trends = req_json['default']['trendingSearchesDays'][0]['trendingSearches']
+        queries = [trend['title']['query'] for trend in trends]
+        if raw:
+            return queries
+
+        import pandas as pd
+
+        return pd.Series(queries, name='query')
+
+    @staticmethod
+    def _daily_trends_records(req_json):
+        for day in req_json['default']['trendingSearchesDays']:
+            for trend in day['trendingSearches']:
+                yield {
+                    'date': day['date'],
+                    'query': trend['title']['query'],
+                    'exploreLink': trend['title'].get('exploreLink'),
+                    'formattedTraffic': trend.get('formattedTraffic'),
+                    'relatedQueries': [related['query']
+                                       for related in trend.get('relatedQueries', [])],
+                    'articles': trend.get('articles', []),
+                    'image': trend.get('image', {}),
+                    'shareUrl': trend.get('shareUrl'),
+                }
+
+    @staticmethod
+    def _daily_trends_frame(records):
+        import pandas as pd
+
+        return pd.DataFrame.from_records(
+            records,
+            columns=['date', 'query', 'exploreLink', 'formattedTraffic',
+                     'relatedQueries', 'articles', 'image', 'shareUrl'])
     
     def realtime_trending_searches(self,
                                 pn='VN',
                                 cat='m',
-                                count =300):
-        """Request data from Google Realtime Search Trends section and returns a dataframe"""
+                                count =300,
+                                bypass_cache=False):
+        """Request data from Google Realtime Search Trends section and returns a dataframe
+
+        The stories share the cached response and must not be mutated.
+        """
+        req_json = self._get_data(
+            url=REALTIME_TRENDING_SEARCHES_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=self._realtime_trending_searches_payload(pn, cat, count),
+            bypass_cache=bypass_cache
+        )
+        return self._parse_realtime_trending_searches(req_json)
+
+    def _realtime_trending_searches_payload(self, pn, cat, count):
         # Don't know what some of the params mean here, followed the nodejs library
         # https://github.com/pat310/google-trends-api/ 's implemenration
 
@@ -492,13 +1029,9 @@ class TrendReq(object):
             rs_value = count-1
 
         forms = {'ns': 15, 'geo': pn, 'tz': self.tz, 'hl': self.hl, 'cat': cat, 'fi' : '0', 'fs' : '0', 'ri' : ri_value, 'rs' : rs_value, 'sort' : 0}
-        req_json = self._get_data(
-            url=REALTIME_TRENDING_SEARCHES_URL,
-            method=GET_METHOD,
-            trim_chars=5,
-            params=forms
-        )
+        return forms
 
+    def _parse_realtime_trending_searches(self, req_json):
         # wanted_keys = ["entityNames", "title"]
 
         req_json = req_json['storySummaries']['trendingStories']
@@ -512,9 +1045,28 @@ class TrendReq(object):
                 date,
                 hl='vi-vn',
                 tz=300,
-                geo='GLOBAL'):
-        """Request data from Google's Top Charts section and return a dataframe"""
+                geo='GLOBAL',
+                bypass_cache=False,
+                raw=False):
+        """Request data from Google's Top Charts section and return a dataframe, a list with `raw`
+
+        The list is a copy of the cached response, it may be modified.
+        """
+
+        chart_payload = self._top_charts_payload(date, hl, tz, geo)
+        # make the request and parse the returned json
+        req_json = self._get_data(
+            url=TOP_CHARTS_URL,
+            method=GET_METHOD,
+            trim_chars=5,
+            params=chart_payload,
+            bypass_cache=bypass_cache,
+            cache_ttl=self._top_charts_cache_ttl(chart_payload['date']),
+            **self.requests_args
+        )
+        return self._parse_top_charts(req_json, raw)
 
+    def _top_charts_payload(self, date, hl, tz, geo):
         try:
             date = int(date)
         except:
@@ -524,23 +1076,29 @@ class TrendReq(object):
         # create the payload
         chart_payload = {'hl': hl, 'tz': tz, 'date': date, 'geo': geo,
                          'isMobile': False}
+        return chart_payload
 
-        # make the request and parse the returned json
-        req_json = self._get_data(
-            url=TOP_CHARTS_URL,
-            method=GET_METHOD,
-            trim_chars=5,
-            params=chart_payload,
-            **self.requests_args
-        )
+    @staticmethod
+    def _top_charts_cache_ttl(date):
+        """Charts of a past year never change, cache them for good"""
+        if date < datetime.now().year:
+            return math.inf
+        return None
+
+    def _parse_top_charts(self, req_json, raw=False):
         try:
-            df = pd.DataFrame(req_json['topCharts'][0]['listItems'])
+            items = req_json['topCharts'][0]['listItems']
         except IndexError:
-            df = None
-        return df
+            return None
+        if raw:
+            return copy.deepcopy(items)
 
-    def suggestions(self, keyword):
-        """Request data from Google's Keyword Suggestion dropdown and return a dictionary"""
+        import pandas as pd
+
+        return pd.DataFrame(items)
+
+    def suggestions(self, keyword, bypass_cache=False):
+        """Request data from Google's Keyword Suggestion dropdown and return a copy of the topics"""
 
         # make the request
         kw_param = quote(keyword)
@@ -551,12 +1109,14 @@ class TrendReq(object):
             params=parameters,
             method=GET_METHOD,
             trim_chars=5,
+            bypass_cache=bypass_cache,
             **self.requests_args
         )['default']['topics']
-        return req_json
+        # the response is cached, callers get their own topics
+        return copy.deepcopy(req_json)
 
-    def categories(self):
-        """Request available categories data from Google's API and return a dictionary"""
+    def categories(self, bypass_cache=False):
+        """Request available categories data from Google's API and return a copy of the dictionary"""
 
         params = {'hl': self.hl}
 
@@ -565,20 +1125,97 @@ class TrendReq(object):
             params=params,
             method=GET_METHOD,
             trim_chars=5,
+            bypass_cache=bypass_cache,
             **self.requests_args
         )
-        return req_json
+        # the response is cached, callers get their own categories
+        return copy.deepcopy(req_json)
 
     def get_historical_interest(self, keywords, year_start=2018, month_start=1,
                                 day_start=1, hour_start=0, year_end=2018,
                                 month_end=2, day_end=1, hour_end=0, cat=0,
-                                geo='', gprop='', sleep=0, frequency='hourly'):
-        """Gets historical hourly data for interest by chunking requests to 1 week at a time (which is what Google allows)"""
+                                geo='', gprop='', sleep=0, frequency='hourly',
+                                max_workers=1, checkpoint_path=None):
+        """Gets historical hourly data for interest by chunking requests to 1 week at a time (which is what Google allows)
+
+        Every window is planned up front and fetched by up to `max_workers`
+        threads, a window starts at most every `sleep` seconds. The instance's
+        payload is left untouched.
+
+        With `checkpoint_path` every fetched window is saved to that SQLite file
+        and windows already saved by a previous run are not fetched again. The
+        timeframes of the windows that failed are listed in
+        `df.attrs['missing_windows']`.
+        """
 
         # construct datetime objects - raises ValueError if invalid parameters
-        initial_start_date = start_date = datetime(year_start, month_start,
-                                                   day_start, hour_start)
+        initial_start_date = datetime(year_start, month_start,
+                                      day_start, hour_start)
         end_date = datetime(year_end, month_end, day_end, hour_end)
+        timeframes = list(self._historical_timeframes(initial_start_date,
+                                                      end_date,
+                                                      frequency))
+        store, pull, windows = self._open_checkpoint(checkpoint_path, keywords,
+                                                     cat, geo, gprop, timeframes)
+        pending = [tf for tf in timeframes if tf not in windows]
+        started = time.monotonic()
+
+        def fetch(i, tf):
+            # just in case you are rate-limited by Google. Recommended is 60 if you are.
+            delay = started + i * sleep - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                windows[tf] = self._window_timeline(keywords, cat, tf, geo, gprop)
+            except Exception as e:
+                logger.warning('window %s failed: %s', tf, e)
+                return
+            if store is not None:
+                store.put(pull, tf, windows[tf])
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(fetch, range(len(pending)), pending))
+        finally:
+            if store is not None:
+                store.close()
+
+        # Return the dataframe with results from our timeframe
+        return self._historical_result(keywords, timeframes, windows,
+                                       initial_start_date, end_date)
+
+    def _window_timeline(self, kw_list, cat, timeframe, geo, gprop):
+        """Request the interest over time of one timeframe without storing its payload or widgets"""
+        payload = self._explore(kw_list, cat, timeframe, geo, gprop)
+        return self._with_tokens(payload, self._interest_over_time_json)
+
+    def _open_checkpoint(self, checkpoint_path, kw_list, cat, geo, gprop, timeframes):
+        """Return the checkpoint store, the pull's key and the windows it already holds"""
+        if not checkpoint_path:
+            return None, None, dict()
+        store = CheckpointStore(checkpoint_path)
+        pull = store.pull_key(kw_list, cat, geo or self.geo, gprop, self.tz)
+        return store, pull, store.get_many(pull, timeframes)
+
+    def _historical_result(self, kw_list, timeframes, windows, start_date, end_date):
+        """Concatenate the windows fetched, in order, and report the missing ones"""
+        import pandas as pd
+
+        frames = [self._parse_interest_over_time(windows[tf], kw_list)
+                  for tf in timeframes if tf in windows]
+        frames = [frame for frame in frames if not frame.empty]
+        df = pd.concat(frames) if frames else pd.DataFrame()
+        df = df.loc[start_date:end_date]
+        missing = [tf for tf in timeframes if tf not in windows]
+        if missing:
+            logger.warning('{} of {} windows could not be fetched: {}'.format(
+                len(missing), len(timeframes), ', '.join(missing)))
+        df.attrs['missing_windows'] = missing
+        return df
+
+    @staticmethod
+    def _historical_timeframes(start_date, end_date, frequency):
+        """Yield the timeframes covering [start_date, end_date] in chunks Google accepts"""
 
         # Timedeltas:
         # 7 days for hourly
@@ -587,62 +1224,24 @@ class TrendReq(object):
         
         if frequency == 'hourly':
             delta = timedelta(days=7)
+            date_format = '%Y-%m-%dT%H'
         elif frequency == 'daily':
             delta = timedelta(days=250)
+            date_format = '%Y-%m-%d'
         else:
             raise(ValueError('Frequency must be hourly or daily'))
 
-        df = pd.DataFrame()
-
         date_iterator = start_date
         date_iterator += delta
 
         while True:
             # format date to comply with API call (different for hourly/daily)
-
-            if frequency == 'hourly':
-                start_date_str = start_date.strftime('%Y-%m-%dT%H')
-                date_iterator_str = date_iterator.strftime('%Y-%m-%dT%H')
-            elif frequency == 'daily':
-                start_date_str = start_date.strftime('%Y-%m-%d')
-                date_iterator_str = date_iterator.strftime('%Y-%m-%d')
-
-            tf = start_date_str + ' ' + date_iterator_str
-
-            try:
-                self.build_payload(keywords, cat, tf, geo, gprop)
-                week_df = self.interest_over_time()
-                df = df.append(week_df)
-            except Exception as e:
-                print(e)
-                pass
+            yield start_date.strftime(date_format) + ' ' + date_iterator.strftime(date_format)
 
             start_date += delta
             date_iterator += delta
 
             if (date_iterator > end_date):
                 # Run more days to get remaining data that would have been truncated if we stopped now
-                if frequency == 'hourly':
-                    start_date_str = start_date.strftime('%Y-%m-%dT%H')
-                    date_iterator_str = date_iterator.strftime('%Y-%m-%dT%H')
-                elif frequency == 'daily':
-                    start_date_str = start_date.strftime('%Y-%m-%d')
-                    date_iterator_str = date_iterator.strftime('%Y-%m-%d')
-
-                tf = start_date_str + ' ' + date_iterator_str
-
-                try:
-                    self.build_payload(keywords, cat, tf, geo, gprop)
-                    week_df = self.interest_over_time()
-                    df = df.append(week_df)
-                except Exception as e:
-                    print(e)
-                    pass
+                yield start_date.strftime(date_format) + ' ' + date_iterator.strftime(date_format)
                 break
-
-            # just in case you are rate-limited by Google. Recommended is 60 if you are.
-            if sleep > 0:
-                time.sleep(sleep)
-
-        # Return the dataframe with results from our timeframe
-        return df.loc[initial_start_date:end_date]
\ No newline at end of file
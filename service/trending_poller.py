@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TrendingSnapshot(object):
+    """
+    Realtime trending stories as fetched at `fetched_at`, with their JSON body
+
+    The body is encoded once when the snapshot is taken, serving it costs the
+    same whatever the number of stories. Immutable, a new snapshot replaces
+    the previous one as a whole.
+    """
+    __slots__ = ('stories', 'body', 'fetched_at')
+
+    def __init__(self, stories, body, fetched_at):
+        set_attr = super(TrendingSnapshot, self).__setattr__
+        set_attr('stories', tuple(stories))
+        set_attr('body', body)
+        set_attr('fetched_at', fetched_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TrendingSnapshot is immutable')
+
+    @classmethod
+    def encode(cls, stories, fetched_at=None):
+        body = json.dumps(stories, separators=(',', ':')).encode('utf-8')
+        return cls(stories, body, time.time() if fetched_at is None else fetched_at)
+
+    @property
+    def age(self):
+        """Seconds since the stories were fetched"""
+        return max(time.time() - self.fetched_at, 0.0)
+
+
+class TrendingPoller(object):
+    """
+    Background task refreshing a `TrendingSnapshot` every `interval` seconds
+
+    `fetch` is a coroutine function returning the stories. Each wait is
+    `interval` spread by up to `jitter` of it either way, so that workers
+    started together do not poll Google in step. A failed refresh is logged
+    and the previous snapshot kept until the next one succeeds. With a
+    `StoryTracker` each new snapshot is diffed against the previous one.
+    """
+    def __init__(self, fetch, interval, jitter=0.1, executor=None, tracker=None):
+        self.fetch = fetch
+        self.interval = interval
+        self.jitter = jitter
+        self.executor = executor
+        self.tracker = tracker
+        self.snapshot = None
+        self.refreshes = 0
+        self.failures = 0
+        self._task = None
+
+    def start(self, loop=None):
+        if self._task is None or self._task.done():
+            loop = loop or asyncio.get_event_loop()
+            self._task = loop.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _delay(self):
+        return max(self.interval * (1 + random.uniform(-self.jitter, self.jitter)), 0)
+
+    async def refresh(self):
+        """Fetch the stories now and return the new snapshot"""
+        stories = await self.fetch()
+        fetched_at = time.time()
+        if self.executor is None:
+            snapshot = TrendingSnapshot.encode(stories, fetched_at)
+        else:
+            snapshot = await self.executor.run(TrendingSnapshot.encode, stories, fetched_at)
+        if self.tracker is not None:
+            self.tracker.update(snapshot.stories, fetched_at)
+        self.snapshot = snapshot
+        self.refreshes += 1
+        return snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Refreshing the trending snapshot failed: {e}")
+            await asyncio.sleep(self._delay())
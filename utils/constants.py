@@ -2,6 +2,8 @@
 
 GET_METHOD = 'get'
 POST_METHOD = 'post'
+# every URL below starts with it, TrendReq(host=...) sends them elsewhere (e.g. benchmark/standin.py)
+TRENDS_HOST = 'https://trends.google.com'
 GENERAL_URL = 'https://trends.google.com/trends/api/explore'
 INTEREST_OVER_TIME_URL = 'https://trends.google.com/trends/api/widgetdata/multiline'
 INTEREST_BY_REGION_URL = 'https://trends.google.com/trends/api/widgetdata/comparedgeo'
@@ -13,6 +15,55 @@ CATEGORIES_URL = 'https://trends.google.com/trends/api/explore/pickers/category'
 TODAY_SEARCHES_URL = 'https://trends.google.com/trends/api/dailytrends'
 REALTIME_TRENDING_SEARCHES_URL = 'https://trends.google.com/trends/api/realtimetrends'
 ERROR_CODES = (500, 502, 504, 429)
+ENDPOINT_URLS = (
+    GENERAL_URL,
+    INTEREST_OVER_TIME_URL,
+    INTEREST_BY_REGION_URL,
+    RELATED_QUERIES_URL,
+    TRENDING_SEARCHES_URL,
+    TOP_CHARTS_URL,
+    SUGGESTIONS_URL,
+    CATEGORIES_URL,
+    TODAY_SEARCHES_URL,
+    REALTIME_TRENDING_SEARCHES_URL
+)
+# seconds a response stays in the response cache, endpoints not listed are never cached
+RESPONSE_CACHE_TTLS = {
+    REALTIME_TRENDING_SEARCHES_URL: 5 * 60,  # 5 minutes
+    TRENDING_SEARCHES_URL: 5 * 60,
+    TODAY_SEARCHES_URL: 30 * 60,
+    SUGGESTIONS_URL: 60 * 60,
+    TOP_CHARTS_URL: 24 * 60 * 60,  # top charts of past years never expire
+    CATEGORIES_URL: 24 * 60 * 60,
+    GENERAL_URL: 10 * 60  # widget tokens of a query, renewed when Google rejects them
+}
+RESPONSE_CACHE_SIZE = 1024
+# seconds a response is kept in the on-disk cache that survives restarts
+DISK_CACHE_TTLS = {
+    SUGGESTIONS_URL: 24 * 60 * 60,  # 1 day
+    TOP_CHARTS_URL: 7 * 24 * 60 * 60,  # top charts of past years never expire
+    CATEGORIES_URL: 7 * 24 * 60 * 60
+}
+GOOGLE_COOKIE_URL = 'https://trends.google.com/?geo={geo}'
+# responses after which the NID cookie is dropped and fetched again
+COOKIE_REJECTED_CODES = (401, 403)
+# widget data responses after which the query's tokens are requested again
+WIDGET_TOKEN_REJECTED_CODES = (400, 401, 403)
+COOKIE_TTL = 30 * 60  # 30 minutes
+COOKIE_REFRESH_AHEAD = 5 * 60  # 5 minutes
+PROXY_QUARANTINE_BASE = 30  # seconds, doubled on each consecutive failure
+PROXY_QUARANTINE_MAX = 30 * 60  # 30 minutes
+# requests per second per (endpoint, proxy), adapted between min and max
+RATE_LIMIT = 1.0
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_MIN = 0.05
+RATE_LIMIT_MAX = 10.0
+# Google compares at most 5 keywords in one payload
+MAX_KEYWORDS = 5
+# related widget requests in flight at once, one per keyword
+RELATED_MAX_WORKERS = MAX_KEYWORDS
+# keyword groups of bulk_interest_over_time in flight at once
+BULK_MAX_WORKERS = 4
 
 
 HOST_LOCATE = 'vi-vn'
@@ -23,6 +74,8 @@ PROXIES = ''
 RETRIES = 0
 BACKOFF_FACTOR = 0
 REQUEST_ARGS = None
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
 
 
 
@@ -35,6 +88,13 @@ DEFAULT_RESPONSE_TIMEOUT = 60 * 60  # 1 hour
 DEFAULT_SANIC_WORKERS = 1
 ENV_SANIC_WORKERS = "SANIC_WORKERS"
 ENV_SANIC_BACKLOG = "SANIC_BACKLOG"
+ENV_AGENT_EXECUTOR_WORKERS = "AGENT_EXECUTOR_WORKERS"
+ENV_TRENDING_POLL_INTERVAL = "TRENDING_POLL_INTERVAL"
+DEFAULT_TRENDING_POLL_INTERVAL = 60  # seconds, 0 serves every request live
+TRENDING_POLL_JITTER = 0.1  # fraction of the interval
+STORY_DIFF_HISTORY = 100  # diffs of trending stories kept for consumers
+ENV_DISK_CACHE_PATH = "TRENDS_DISK_CACHE_PATH"
+ENV_TRENDS_HOST = "TRENDS_HOST"
 ENV_LOG_LEVEL_LIBRARIES = "LOG_LEVEL_LIBRARIES"
 DEFAULT_LOG_LEVEL_LIBRARIES = "ERROR"
 
@@ -12,6 +12,7 @@ from utils.constants import (
     DEFAULT_ENCODING,
     DEFAULT_SANIC_WORKERS,
     ENV_SANIC_WORKERS,
+    ENV_AGENT_EXECUTOR_WORKERS,
     ENV_LOG_LEVEL_LIBRARIES,
     DEFAULT_LOG_LEVEL_LIBRARIES,
     TCP_PROTOCOL
@@ -155,6 +156,32 @@ def number_of_sanic_workers() -> int:
     )
     return _log_and_get_default_number_of_workers()
 
+def number_of_executor_workers() -> Optional[int]:
+    """Get the number of threads of the agent's executor.
+    Read from the environment variable constants.ENV_AGENT_EXECUTOR_WORKERS,
+    `None` (the thread pool's default) when it is not set or not valid.
+    """
+    env_value = os.environ.get(ENV_AGENT_EXECUTOR_WORKERS)
+    if env_value is None:
+        return None
+
+    try:
+        workers = int(env_value)
+    except ValueError:
+        logger.error(
+            f"Cannot convert environment variable `{ENV_AGENT_EXECUTOR_WORKERS}` "
+            f"to int ('{env_value}')."
+        )
+        return None
+
+    if workers < 1:
+        logger.debug(
+            f"Cannot set number of executor workers to the desired value "
+            f"({workers}). The number of workers must be at least 1."
+        )
+        return None
+    return workers
+
 def update_sanic_log_level(
     log_file: Optional[Text] = None,
     use_syslog: Optional[bool] = False,